@@ -5,6 +5,8 @@ Reads JSON files from state/inbox/, validates them against the protocol,
 applies valid messages to canonical state, and moves processed files
 to state/inbox/_processed/.
 """
+import calendar
+import functools
 import json
 import os
 import shutil
@@ -14,7 +16,7 @@ from datetime import datetime, timezone
 
 PROTOCOL_VERSION = 1
 
-MESSAGE_TYPES = {
+MESSAGE_TYPES = frozenset({
     'join', 'leave', 'heartbeat', 'idle', 'move', 'warp',
     'say', 'shout', 'whisper', 'emote',
     'build', 'plant', 'craft', 'compose', 'harvest',
@@ -28,19 +30,19 @@ MESSAGE_TYPES = {
     'reputation_adjust', 'report_griefing',
     'election_start', 'election_vote', 'election_finalize',
     'steward_set_welcome', 'steward_set_policy', 'steward_moderate',
-}
+})
 
-PLATFORMS = {'desktop', 'phone', 'vr', 'ar', 'api'}
+PLATFORMS = frozenset({'desktop', 'phone', 'vr', 'ar', 'api'})
 
 # Types that API agents are allowed to use
-API_ALLOWED_TYPES = {
+API_ALLOWED_TYPES = frozenset({
     'say', 'shout', 'emote', 'move', 'warp',
     'discover', 'build', 'plant', 'harvest', 'craft', 'compose',
     'gift', 'trade_offer', 'trade_accept', 'trade_decline', 'buy', 'sell',
     'intention_set', 'intention_clear',
     'join', 'leave', 'heartbeat',
     'inspect', 'teach', 'mentor_offer',
-}
+})
 
 # Default rate limits
 DEFAULT_RATE = {'messages_per_minute': 2, 'messages_per_hour': 30}
@@ -57,8 +59,24 @@ def load_json(path):
 
 def save_json(path, data):
     """Save data as JSON."""
+    # Encode in one call and write once: json.dump() would stream the
+    # document through iterencode with one write per fragment
+    text = json.dumps(data, indent=2)
     with open(path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2)
+        f.write(text)
+
+
+_NUMBER_TYPES = (int, float)
+_COORDS = ('x', 'y', 'z')
+
+
+def _is_iso_timestamp(ts):
+    """True if ts parses as ISO-8601."""
+    try:
+        datetime.fromisoformat(ts.replace('Z', '+00:00'))
+    except (ValueError, AttributeError):
+        return False
+    return True
 
 
 def validate_message(msg):
@@ -80,11 +98,8 @@ def validate_message(msg):
     ts = msg.get('ts')
     if not isinstance(ts, str) or not ts:
         errors.append('Invalid ts: must be a non-empty string')
-    else:
-        try:
-            datetime.fromisoformat(ts.replace('Z', '+00:00'))
-        except (ValueError, AttributeError):
-            errors.append('Invalid ts: must be ISO-8601')
+    elif not _is_iso_timestamp(ts):
+        errors.append('Invalid ts: must be ISO-8601')
 
     # Sequence
     seq = msg.get('seq')
@@ -108,8 +123,8 @@ def validate_message(msg):
     if not isinstance(pos, dict):
         errors.append('Invalid position: must be an object')
     else:
-        for coord in ('x', 'y', 'z'):
-            if not isinstance(pos.get(coord), (int, float)):
+        for coord in _COORDS:
+            if not isinstance(pos.get(coord), _NUMBER_TYPES):
                 errors.append('Invalid position.%s: must be a number' % coord)
         if not isinstance(pos.get('zone'), str) or not pos.get('zone'):
             errors.append('Invalid position.zone: must be a non-empty string')
@@ -142,7 +157,7 @@ def check_api_restrictions(msg):
 
 def _parse_filename_timestamp(fname, agent_name):
     """Extract timestamp from filename: agentname_YYYYMMDDHHMMSS_NN.json.
-    Returns a datetime or None if parsing fails."""
+    Returns UTC epoch seconds or None if parsing fails."""
     prefix = agent_name + '_'
     if not fname.startswith(prefix):
         return None
@@ -151,49 +166,151 @@ def _parse_filename_timestamp(fname, agent_name):
     ts_part = rest[:14]
     if len(ts_part) < 14 or not ts_part.isdigit():
         return None
+    # Fixed-width digits: slice + int + timegm avoids building a datetime
+    year, month, day = int(ts_part[0:4]), int(ts_part[4:6]), int(ts_part[6:8])
+    hour, minute, second = int(ts_part[8:10]), int(ts_part[10:12]), int(ts_part[12:14])
+    if not (1 <= month <= 12 and hour < 24 and minute < 60 and second < 60):
+        return None
     try:
-        return datetime(
-            int(ts_part[0:4]), int(ts_part[4:6]), int(ts_part[6:8]),
-            int(ts_part[8:10]), int(ts_part[10:12]), int(ts_part[12:14]),
-            tzinfo=timezone.utc)
-    except (ValueError, IndexError):
+        # monthrange rejects impossible days (Feb 31) and year 0
+        if not 1 <= day <= calendar.monthrange(year, month)[1]:
+            return None
+        return calendar.timegm((year, month, day, hour, minute, second, 0, 0, 0))
+    except (ValueError, OverflowError):
         return None
 
 
-def check_rate_limit(agent_name, state_dir):
-    """Check if an agent has exceeded rate limits. Returns (allowed, reason)."""
-    # Load agent registration for custom limits
+@functools.lru_cache(maxsize=512)
+def _load_agent_config_cached(path, mtime_ns):
+    """Parse an agent registration file; keyed by mtime so edits invalidate it."""
+    return load_json(path)
+
+
+def _load_agent_config(state_dir, agent_name):
+    """Load agents/<agent>.json, reusing the parsed copy while it is unchanged.
+
+    The returned dict is shared between calls and must not be mutated.
+    """
     agent_file = os.path.join(state_dir, 'agents', '%s.json' % agent_name)
-    agent_data = load_json(agent_file)
+    try:
+        mtime_ns = os.stat(agent_file).st_mtime_ns
+    except OSError:
+        return {}
+    return _load_agent_config_cached(agent_file, mtime_ns)
+
+
+def _rate_bucket_path(state_dir, agent_name):
+    """Path of an agent's token-bucket file: state/rate/<agent>.json.
+
+    agent_name comes from the untrusted message 'from' field, so names that
+    could leave state/rate/ (path separators, '..') get None instead.
+    """
+    if ('/' in agent_name or '\\' in agent_name or '..' in agent_name
+            or os.sep in agent_name or (os.altsep and os.altsep in agent_name)):
+        return None
+    return os.path.join(state_dir, 'rate', '%s.json' % agent_name)
+
+
+def _bucket_tokens(path, max_per_hour, now):
+    """Tokens in the bucket at path after refilling up to now."""
+    bucket = load_json(path)
+    tokens = bucket.get('tokens', max_per_hour)
+    last = bucket.get('last', now)
+    return min(max_per_hour, tokens + (now - last) * max_per_hour / 3600.0)
+
+
+def _check_rate_bucket(agent_name, state_dir, max_per_hour):
+    """Token-bucket rate limit: O(1) per message instead of a directory scan.
+
+    The bucket holds up to max_per_hour tokens and refills continuously at
+    max_per_hour per hour. This only checks for a token; spend_rate_token()
+    consumes it once the message has been applied.
+    Returns (allowed, reason).
+    """
+    path = _rate_bucket_path(state_dir, agent_name)
+    if path is None:
+        return False, 'Invalid agent name for rate limiting: %r' % agent_name
+    if _bucket_tokens(path, max_per_hour, time.time()) < 1:
+        return False, 'Rate limit exceeded: bucket empty (max %d/hour)' % max_per_hour
+    return True, None
+
+
+def _max_per_hour(agent_name, state_dir):
+    """Messages per hour allowed for an agent (registration override or default)."""
+    agent_data = _load_agent_config(state_dir, agent_name)
     rate = agent_data.get('rate_limit', DEFAULT_RATE)
-    max_per_hour = rate.get('messages_per_hour', DEFAULT_RATE['messages_per_hour'])
+    return rate.get('messages_per_hour', DEFAULT_RATE['messages_per_hour'])
+
+
+def spend_rate_token(agent_name, state_dir):
+    """Consume one token from an agent's bucket after a message is applied.
+
+    Only RATE_LIMIT_MODE=bucket keeps tokens; the default scan mode counts
+    files in inbox/_processed instead, so this is a no-op there.
+    """
+    if os.environ.get('RATE_LIMIT_MODE', 'scan') != 'bucket':
+        return
+    path = _rate_bucket_path(state_dir, agent_name)
+    if path is None:
+        return
+    now = time.time()
+    tokens = _bucket_tokens(path, _max_per_hour(agent_name, state_dir), now)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    try:
+        save_json(tmp_path, {'tokens': max(0, tokens - 1), 'last': now})
+        os.replace(tmp_path, path)
+    except OSError:
+        # Don't leave a half-written temp file behind
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def check_rate_limit(agent_name, state_dir):
+    """Check if an agent has exceeded rate limits. Returns (allowed, reason).
+
+    RATE_LIMIT_MODE=bucket switches from the default rolling-window scan of
+    inbox/_processed to a per-agent token bucket under state/rate/.
+    """
+    # Load agent registration for custom limits
+    max_per_hour = _max_per_hour(agent_name, state_dir)
+
+    if os.environ.get('RATE_LIMIT_MODE', 'scan') == 'bucket':
+        return _check_rate_bucket(agent_name, state_dir, max_per_hour)
 
     # Count processed messages in the last hour
     processed_dir = os.path.join(state_dir, 'inbox', '_processed')
     if not os.path.isdir(processed_dir):
         return True, None
 
-    now = datetime.now(timezone.utc)
-    one_hour_ago = now - __import__('datetime').timedelta(hours=1)
+    # Window start, computed once for the whole scan
+    cutoff = time.time() - 3600
     count = 0
-    for fname in os.listdir(processed_dir):
-        if not fname.startswith(agent_name + '_'):
-            continue
-        if not fname.endswith('.json'):
-            continue
-        # Try filename timestamp first (more reliable than mtime)
-        file_ts = _parse_filename_timestamp(fname, agent_name)
-        if file_ts and file_ts >= one_hour_ago:
-            count += 1
-        elif file_ts is None:
-            # Fallback to mtime if filename doesn't parse
-            fpath = os.path.join(processed_dir, fname)
-            try:
-                mtime = os.path.getmtime(fpath)
-                if mtime >= one_hour_ago.timestamp():
-                    count += 1
-            except OSError:
-                pass
+    prefix = agent_name + '_'
+    # scandir yields DirEntry objects whose names need no extra syscall and
+    # whose stat() result is cached, so the mtime fallback stays cheap
+    with os.scandir(processed_dir) as entries:
+        for entry in entries:
+            fname = entry.name
+            if not fname.startswith(prefix):
+                continue
+            if not fname.endswith('.json'):
+                continue
+            # Try filename timestamp first (more reliable than mtime)
+            file_ts = _parse_filename_timestamp(fname, agent_name)
+            if file_ts is not None and file_ts >= cutoff:
+                count += 1
+            elif file_ts is None:
+                # Fallback to mtime if filename doesn't parse
+                try:
+                    mtime = entry.stat().st_mtime
+                    if mtime >= cutoff:
+                        count += 1
+                except OSError:
+                    pass
 
     if count >= max_per_hour:
         return False, 'Rate limit exceeded: %d messages in last hour (max %d/hour)' % (count, max_per_hour)
@@ -479,11 +596,13 @@ def process_inbox(state_dir):
         print('No inbox directory found at %s' % inbox_dir)
         return results
 
-    # Get all JSON files in inbox (not in _processed)
-    inbox_files = sorted([
-        f for f in os.listdir(inbox_dir)
-        if f.endswith('.json') and os.path.isfile(os.path.join(inbox_dir, f))
-    ])
+    # Get all JSON files in inbox (not in _processed). One scandir pass
+    # yields name, full path and file type without a stat per entry.
+    with os.scandir(inbox_dir) as entries:
+        inbox_files = sorted(
+            (entry.name, entry.path) for entry in entries
+            if entry.name.endswith('.json') and entry.is_file()
+        )
 
     if not inbox_files:
         print('No messages in inbox.')
@@ -491,8 +610,7 @@ def process_inbox(state_dir):
 
     print('Processing %d inbox messages...' % len(inbox_files))
 
-    for filename in inbox_files:
-        filepath = os.path.join(inbox_dir, filename)
+    for filename, filepath in inbox_files:
         print('  %s: ' % filename, end='')
 
         # Load message
@@ -537,14 +655,36 @@ def process_inbox(state_dir):
         # Apply to state
         try:
             apply_to_state(msg, state_dir)
-            print('OK (%s from %s)' % (msg['type'], msg['from']))
-            results['processed'] += 1
-            shutil.move(filepath, os.path.join(processed_dir, filename))
         except Exception as e:
             print('APPLY ERROR — %s' % e)
             results['errors'].append('%s: apply error — %s' % (filename, e))
             results['rejected'] += 1
             shutil.move(filepath, os.path.join(processed_dir, filename + '.error'))
+            continue
+
+        # The message is applied from here on: bookkeeping failures are
+        # recorded but must not abort the run or leave it in the inbox,
+        # where the next run would apply it a second time.
+        print('OK (%s from %s)' % (msg['type'], msg['from']))
+        results['processed'] += 1
+
+        # Only a successfully applied message uses up rate-limit budget
+        try:
+            spend_rate_token(msg['from'], state_dir)
+        except OSError as e:
+            print('    RATE BUCKET ERROR — %s' % e)
+            results['errors'].append('%s: rate bucket error — %s' % (filename, e))
+
+        try:
+            shutil.move(filepath, os.path.join(processed_dir, filename))
+        except OSError as e:
+            print('    MOVE ERROR — %s' % e)
+            results['errors'].append('%s: move error — %s' % (filename, e))
+            try:
+                os.remove(filepath)
+            except OSError as e:
+                results['errors'].append('%s: could not remove applied message — %s'
+                                         % (filename, e))
 
     print('\nResults: %d processed, %d rejected' % (results['processed'], results['rejected']))
     return results
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 """Economy processing: earnings, transactions, ledger integrity."""
+import bisect
 import json
 import sys
 import time
@@ -55,8 +56,13 @@ _TAX_BRACKETS = [
     (500, float('inf'), 0.40),
 ]
 
+# Bracket lower bounds and rates as parallel tuples for bisect lookup
+_TAX_LOWER_BOUNDS = tuple(low for low, _, _ in _TAX_BRACKETS)
+_TAX_RATES = tuple(rate for _, _, rate in _TAX_BRACKETS)
+
 TREASURY_ID = 'TREASURY'
 SYSTEM_ID = 'SYSTEM'
+_SYSTEM_ACCOUNTS = frozenset((TREASURY_ID, SYSTEM_ID))
 
 # UBI constants (§6.4.4)
 BASE_UBI_AMOUNT = 5          # Max Spark per citizen per game day
@@ -75,10 +81,7 @@ def _get_tax_rate(balance):
     """Get progressive tax rate based on current balance."""
     if balance < 0:
         return 0.0
-    for low, high, rate in _TAX_BRACKETS:
-        if low <= balance <= high:
-            return rate
-    return 0.0
+    return _TAX_RATES[bisect.bisect_right(_TAX_LOWER_BOUNDS, balance) - 1]
 
 
 def process_earnings(economy, actions):
@@ -98,6 +101,14 @@ def process_earnings(economy, actions):
     if 'ledger' not in economy:
         economy['ledger'] = []
 
+    # Bind the per-action lookups once; this loop runs for every queued action.
+    # Ledger entries are collected locally and added with a single extend.
+    balances = economy['balances']
+    new_entries = []
+    append_entry = new_entries.append
+    earn_for = EARN_TABLE.get
+    tax_rate_for = _get_tax_rate
+
     for action in actions:
         if not isinstance(action, dict):
             continue
@@ -109,47 +120,44 @@ def process_earnings(economy, actions):
             continue
 
         # Calculate earnings
-        spark_earned = EARN_TABLE.get(action_type, 0)
-
-        if spark_earned > 0:
-            # Update balance
-            if user_id not in economy['balances']:
-                economy['balances'][user_id] = 0
-
-            # Calculate progressive tax (§6.4)
-            current_balance = economy['balances'][user_id]
-            tax_rate = _get_tax_rate(current_balance)
-            tax_amount = int(spark_earned * tax_rate)  # floor (player-favorable)
-            net_amount = spark_earned - tax_amount
+        spark_earned = earn_for(action_type, 0)
+        if spark_earned <= 0:
+            continue
 
-            economy['balances'][user_id] += net_amount
+        # Calculate progressive tax (§6.4)
+        current_balance = balances.get(user_id, 0)
+        tax_rate = tax_rate_for(current_balance)
+        tax_amount = int(spark_earned * tax_rate)  # floor (player-favorable)
+        net_amount = spark_earned - tax_amount
+
+        balances[user_id] = current_balance + net_amount
+        ts = action['ts'] if 'ts' in action else time.time()
+
+        # Add ledger entry
+        append_entry({
+            'type': 'earn',
+            'user': user_id,
+            'amount': net_amount,
+            'grossAmount': spark_earned,
+            'taxWithheld': tax_amount,
+            'taxRate': tax_rate,
+            'action': action_type,
+            'timestamp': ts
+        })
 
-            # Add ledger entry
-            economy['ledger'].append({
-                'type': 'earn',
+        # Credit TREASURY with tax
+        if tax_amount > 0:
+            balances[TREASURY_ID] = balances.get(TREASURY_ID, 0) + tax_amount
+            append_entry({
+                'type': 'tax',
                 'user': user_id,
-                'amount': net_amount,
-                'grossAmount': spark_earned,
-                'taxWithheld': tax_amount,
+                'amount': tax_amount,
                 'taxRate': tax_rate,
                 'action': action_type,
-                'timestamp': action.get('ts', time.time())
+                'timestamp': ts
             })
 
-            # Credit TREASURY with tax
-            if tax_amount > 0:
-                if TREASURY_ID not in economy['balances']:
-                    economy['balances'][TREASURY_ID] = 0
-                economy['balances'][TREASURY_ID] += tax_amount
-                economy['ledger'].append({
-                    'type': 'tax',
-                    'user': user_id,
-                    'amount': tax_amount,
-                    'taxRate': tax_rate,
-                    'action': action_type,
-                    'timestamp': action.get('ts', time.time())
-                })
-
+    economy['ledger'].extend(new_entries)
     return economy
 
 
@@ -233,8 +241,6 @@ def apply_wealth_tax(economy, timestamp=None):
     if TREASURY_ID not in economy['balances']:
         economy['balances'][TREASURY_ID] = 0
 
-    _SYSTEM_ACCOUNTS = {TREASURY_ID, 'SYSTEM'}
-
     for citizen_id in list(economy['balances'].keys()):
         if citizen_id in _SYSTEM_ACCOUNTS:
             continue
@@ -283,15 +289,10 @@ def get_ubi_eligible_citizens(economy):
     Returns:
         list of citizen ID strings
     """
-    _SYSTEM_ACCOUNTS = {TREASURY_ID, SYSTEM_ID}
-    eligible = []
-    for pid in economy.get('balances', {}):
-        if pid not in _SYSTEM_ACCOUNTS:
-            eligible.append(pid)
-    return eligible
+    return [pid for pid in economy.get('balances', {}) if pid not in _SYSTEM_ACCOUNTS]
 
 
-def distribute_ubi(economy, game_day, timestamp=None):
+def distribute_ubi(economy, game_day, timestamp=None, batch_ledger=False):
     """
     Distribute UBI from TREASURY to all eligible citizens (§6.4.4).
 
@@ -304,18 +305,28 @@ def distribute_ubi(economy, game_day, timestamp=None):
     economy['_lastUbiDay'] >= game_day it returns without distributing.
 
     Every payment is recorded in the public ledger with type
-    'ubi_distribution' (§6.4.7 transparency mandate).
+    'ubi_distribution' (§6.4.7 transparency mandate).  With batch_ledger
+    the whole payout is recorded as a single 'ubi_distribution_batch'
+    entry listing the recipients instead; iter_ubi_entries() expands it
+    back into per-citizen entries.
 
     Args:
         economy: dict with 'balances' and 'ledger' keys
         game_day: integer game-day number (worldTime // 1440)
         timestamp: Unix timestamp for ledger entries (defaults to
                    time.time())
+        batch_ledger: record one batch entry instead of one per citizen
 
     Returns:
         Updated economy dict (mutated in place and returned).
         economy['_lastUbiDay'] is set to game_day after distribution.
+        A repeat call for the same game_day returns the economy untouched.
     """
+    # Idempotency guard: distribute at most once per game day.  Checked
+    # before any other work so repeat calls within a day are free.
+    if game_day <= economy.get('_lastUbiDay', -1):
+        return economy
+
     if 'balances' not in economy:
         economy['balances'] = {}
     if 'ledger' not in economy:
@@ -325,11 +336,6 @@ def distribute_ubi(economy, game_day, timestamp=None):
     if TREASURY_ID not in economy['balances']:
         economy['balances'][TREASURY_ID] = 0
 
-    # Idempotency guard: distribute at most once per game day
-    last_ubi_day = economy.get('_lastUbiDay', -1)
-    if game_day <= last_ubi_day:
-        return economy
-
     # Collect eligible citizens
     eligible = get_ubi_eligible_citizens(economy)
 
@@ -351,28 +357,67 @@ def distribute_ubi(economy, game_day, timestamp=None):
 
     ts = timestamp if timestamp is not None else time.time()
 
-    for pid in eligible:
-        # Defensive check: treasury must still have enough
-        if economy['balances'].get(TREASURY_ID, 0) < per_citizen:
-            break
-        if pid not in economy['balances']:
-            economy['balances'][pid] = 0
-        economy['balances'][pid] += per_citizen
-        economy['balances'][TREASURY_ID] -= per_citizen
+    # per_citizen <= treasury // count, so the treasury covers every payment
+    # and can be debited once for the whole cohort.
+    balances = economy['balances']
+    eligible_count = len(eligible)
+    balances.update({pid: balances.get(pid, 0) + per_citizen for pid in eligible})
+    balances[TREASURY_ID] = treasury_balance - per_citizen * eligible_count
 
-        # Public ledger entry for transparency (§6.4.7)
+    # Public ledger entry for transparency (§6.4.7)
+    if batch_ledger:
         economy['ledger'].append({
-            'type': 'ubi_distribution',
-            'user': pid,
+            'type': 'ubi_distribution_batch',
+            'recipients': eligible,
             'amount': per_citizen,
             'gameDay': game_day,
-            'eligibleCount': len(eligible),
+            'eligibleCount': eligible_count,
             'timestamp': ts,
         })
+        return economy
+
+    economy['ledger'].extend({
+        'type': 'ubi_distribution',
+        'user': pid,
+        'amount': per_citizen,
+        'gameDay': game_day,
+        'eligibleCount': eligible_count,
+        'timestamp': ts,
+    } for pid in eligible)
 
     return economy
 
 
+def iter_ubi_entries(economy):
+    """
+    Yield every UBI payment in the ledger as a per-citizen entry.
+
+    Plain 'ubi_distribution' entries are yielded as-is; each
+    'ubi_distribution_batch' entry is expanded into one entry per recipient
+    with the same shape.
+
+    Args:
+        economy: dict with 'ledger' key
+
+    Yields:
+        dict entries with type 'ubi_distribution'
+    """
+    for entry in economy.get('ledger', []):
+        entry_type = entry.get('type')
+        if entry_type == 'ubi_distribution':
+            yield entry
+        elif entry_type == 'ubi_distribution_batch':
+            for pid in entry['recipients']:
+                yield {
+                    'type': 'ubi_distribution',
+                    'user': pid,
+                    'amount': entry['amount'],
+                    'gameDay': entry['gameDay'],
+                    'eligibleCount': entry['eligibleCount'],
+                    'timestamp': entry['timestamp'],
+                }
+
+
 def process_structure_maintenance(economy, structures, timestamp=None):
     """
     Apply structure maintenance costs once per game day (§6.5.1).
@@ -402,7 +447,6 @@ def process_structure_maintenance(economy, structures, timestamp=None):
     if timestamp is None:
         timestamp = time.time()
 
-    _SYSTEM_ACCOUNTS = {TREASURY_ID, SYSTEM_ID}
     structures_to_remove = []
 
     for structure_id, structure in list(structures.items()):
@@ -163,16 +163,12 @@ TREASURY_ID = 'TREASURY'
 BASE_UBI_AMOUNT = 5
 WEALTH_TAX_THRESHOLD = 500
 WEALTH_TAX_RATE = 0.02
+_SYSTEM_ACCOUNTS = frozenset((TREASURY_ID, 'SYSTEM'))
 
 
 def _get_ubi_eligible(economy, current_time):
     """Find players eligible for UBI: anyone with a balance entry, excluding system accounts."""
-    eligible = []
-    for pid in economy.get('balances', {}):
-        if pid in (TREASURY_ID, 'SYSTEM'):
-            continue
-        eligible.append(pid)
-    return eligible
+    return [pid for pid in economy.get('balances', {}) if pid not in _SYSTEM_ACCOUNTS]
 
 
 def _distribute_ubi(state):
@@ -210,52 +206,63 @@ def _distribute_ubi(state):
 
     ts_wt = time.time()
 
+    # Each step below only appends to the ledger, so the entries it produced
+    # are the tail past the pre-step length; mirror just that slice instead of
+    # rescanning the whole (ever-growing) ledger.
     # 1. Apply wealth tax (§6.4.6): 2% on balances above 500
+    pre_ledger_len = len(economy['ledger'])
     economy = _apply_wealth_tax(economy, timestamp=ts_wt)
     # Mirror wealth tax ledger entries into transactions for backward compat
-    for entry in economy.get('ledger', []):
-        if entry.get('type') == 'wealth_tax' and entry.get('timestamp') == ts_wt:
-            economy['transactions'].append({
-                'type': 'wealth_tax',
-                'from': entry['user'],
-                'amount': entry['amount'],
-                'timestamp': ts_wt,
-            })
+    economy['transactions'].extend(
+        {
+            'type': 'wealth_tax',
+            'from': entry['user'],
+            'amount': entry['amount'],
+            'timestamp': ts_wt,
+        }
+        for entry in economy['ledger'][pre_ledger_len:]
+        if entry.get('type') == 'wealth_tax'
+    )
 
     # 2. Structure maintenance (§6.5.1): 1 Spark/day per structure (SYSTEM sink)
     structures = state.get('structures', {})
     if structures:
+        pre_ledger_len = len(economy['ledger'])
         economy, to_remove = _process_structure_maintenance(
             economy, structures, timestamp=ts_wt
         )
         for sid in to_remove:
             structures.pop(sid, None)
         # Mirror maintenance ledger entries into transactions for backward compat
-        for entry in economy.get('ledger', []):
-            if entry.get('type') == 'structure_maintenance' and entry.get('timestamp') == ts_wt:
-                economy['transactions'].append({
-                    'type': 'maintenance',
-                    'from': entry['user'],
-                    'amount': entry['amount'],
-                    'structureId': entry['structureId'],
-                    'timestamp': ts_wt,
-                })
+        economy['transactions'].extend(
+            {
+                'type': 'maintenance',
+                'from': entry['user'],
+                'amount': entry['amount'],
+                'structureId': entry['structureId'],
+                'timestamp': ts_wt,
+            }
+            for entry in economy['ledger'][pre_ledger_len:]
+            if entry.get('type') == 'structure_maintenance'
+        )
 
     # 3. UBI distribution (§6.4.4): delegate to economy_engine.distribute_ubi
     #    This creates authoritative 'ubi_distribution' ledger entries and
     #    enforces the idempotency guard via economy['_lastUbiDay'].
     ts_ubi = time.time()
-    pre_ledger_len = len(economy.get('ledger', []))
+    pre_ledger_len = len(economy['ledger'])
     economy = _distribute_ubi_ledger(economy, current_day, timestamp=ts_ubi)
     # Mirror new ubi_distribution ledger entries into transactions for backward compat
-    for entry in economy.get('ledger', [])[pre_ledger_len:]:
-        if entry.get('type') == 'ubi_distribution':
-            economy['transactions'].append({
-                'type': 'ubi_payout',
-                'to': entry['user'],
-                'amount': entry['amount'],
-                'timestamp': ts_ubi,
-            })
+    economy['transactions'].extend(
+        {
+            'type': 'ubi_payout',
+            'to': entry['user'],
+            'amount': entry['amount'],
+            'timestamp': ts_ubi,
+        }
+        for entry in economy['ledger'][pre_ledger_len:]
+        if entry.get('type') == 'ubi_distribution'
+    )
 
     state['economy'] = economy
 
@@ -271,32 +278,45 @@ def decay_pet_states(pets_data, delta_seconds):
     Returns:
         Updated pets_data dict
     """
-    updated = json.loads(json.dumps(pets_data))  # Deep copy
-    player_pets = updated.get('playerPets', {})
+    # Pet records are flat scalars, so copying each pet dict is enough to
+    # leave the caller's data untouched.
+    updated = dict(pets_data)
+    player_pets = {
+        pid: dict(pet) if isinstance(pet, dict) else pet
+        for pid, pet in pets_data.get('playerPets', {}).items()
+    }
 
     minutes_elapsed = delta_seconds / 60.0
     hunger_decay = 1.0  # per minute
     mood_decay = 0.5    # per minute
     hunger_threshold_content = 60
 
-    for pid, pet in player_pets.items():
+    # The per-minute deltas and timestamp are identical for every pet, so
+    # compute them once per call instead of once per pet.
+    hunger_gain = hunger_decay * minutes_elapsed
+    mood_loss = mood_decay * minutes_elapsed
+    hungry_mood_loss = mood_loss * 2
+    bond_gain = 0.1 * minutes_elapsed
+    now = time.time()
+
+    for pet in player_pets.values():
         if not isinstance(pet, dict):
             continue
 
         # Hunger increases over time
-        pet['hunger'] = min(100, pet.get('hunger', 0) + hunger_decay * minutes_elapsed)
+        hunger = min(100, pet.get('hunger', 0) + hunger_gain)
+        pet['hunger'] = hunger
 
         # Mood decays faster when hungry
-        effective_mood_decay = mood_decay * minutes_elapsed
-        if pet.get('hunger', 0) > hunger_threshold_content:
-            effective_mood_decay *= 2
-        pet['mood'] = max(0, pet.get('mood', 100) - effective_mood_decay)
+        loss = hungry_mood_loss if hunger > hunger_threshold_content else mood_loss
+        mood = max(0, pet.get('mood', 100) - loss)
+        pet['mood'] = mood
 
         # Passive bonding when pet is happy and fed
-        if pet.get('hunger', 0) < 30 and pet.get('mood', 0) > 50:
-            pet['bond'] = min(100, pet.get('bond', 0) + 0.1 * minutes_elapsed)
+        if hunger < 30 and mood > 50:
+            pet['bond'] = min(100, pet.get('bond', 0) + bond_gain)
 
-        pet['last_updated'] = time.time()
+        pet['last_updated'] = now
 
     updated['playerPets'] = player_pets
     return updated
@@ -332,8 +352,22 @@ def tick(state_json):
     Returns:
         Updated state JSON string
     """
-    state = json.loads(state_json)
+    return json.dumps(tick_dict(json.loads(state_json)), indent=2)
 
+
+def tick_dict(state):
+    """
+    Run one game tick on an already-parsed state dict.
+
+    Same as tick() without the JSON decode/encode around it. The passed
+    dict may be modified in place; use the returned dict as the result.
+
+    Args:
+        state: game state dict
+
+    Returns:
+        Updated state dict
+    """
     # Initialize world time if not present
     if 'worldTime' not in state:
         state['worldTime'] = 0
@@ -380,19 +414,26 @@ def tick(state_json):
     # Update last tick time
     state['lastTickAt'] = current_time
 
-    return json.dumps(state, indent=2)
+    return state
 
 
-def main():
-    """Main entry point: read state, run tick, output updated state."""
+def main(argv=None):
+    """Main entry point: read state, run tick, output updated state.
+
+    Args:
+        argv: optional argument vector (defaults to sys.argv), so callers can
+            run a tick in-process without spawning a new interpreter
+    """
+    if argv is None:
+        argv = sys.argv
     # Read world state
     input_data = None
-    if len(sys.argv) > 1:
+    if len(argv) > 1:
         try:
-            with open(sys.argv[1], 'r') as f:
+            with open(argv[1], 'r') as f:
                 input_data = f.read()
         except FileNotFoundError:
-            print(f"Error: File not found: {sys.argv[1]}", file=sys.stderr)
+            print(f"Error: File not found: {argv[1]}", file=sys.stderr)
             sys.exit(1)
         except Exception as e:
             print(f"Error reading file: {e}", file=sys.stderr)
@@ -402,45 +443,45 @@ def main():
 
     # Read gardens state if provided
     gardens_data = None
-    if len(sys.argv) > 2:
+    if len(argv) > 2:
         try:
-            with open(sys.argv[2], 'r') as f:
+            with open(argv[2], 'r') as f:
                 gardens_data = json.load(f)
         except (FileNotFoundError, json.JSONDecodeError):
             gardens_data = {}
 
     # Read economy state if provided (argv[3])
     economy_data = None
-    if len(sys.argv) > 3:
+    if len(argv) > 3:
         try:
-            with open(sys.argv[3], 'r') as f:
+            with open(argv[3], 'r') as f:
                 economy_data = json.load(f)
         except (FileNotFoundError, json.JSONDecodeError):
             economy_data = {}
 
     # Read guilds state if provided (argv[4])
     guilds_data = load_state_file(
-        sys.argv[4] if len(sys.argv) > 4 else None,
+        argv[4] if len(argv) > 4 else None,
         {'guilds': [], 'invites': [], 'guildMessages': [],
          'nextGuildId': 1, 'nextInviteId': 1, 'nextMessageId': 1}
     )
 
     # Read mentoring state if provided (argv[5])
     mentoring_data = load_state_file(
-        sys.argv[5] if len(sys.argv) > 5 else None,
+        argv[5] if len(argv) > 5 else None,
         {'playerSkills': {}, 'mentorships': {},
          'mentorshipOffers': {}, 'npcLessons': {}}
     )
 
     # Read pets state if provided (argv[6])
     pets_data = load_state_file(
-        sys.argv[6] if len(sys.argv) > 6 else None,
+        argv[6] if len(argv) > 6 else None,
         {'playerPets': {}}
     )
 
     # Read reputation state if provided (argv[7])
     reputation_data = load_state_file(
-        sys.argv[7] if len(sys.argv) > 7 else None,
+        argv[7] if len(argv) > 7 else None,
         {'scores': {}, 'history': [], 'lastDecayAt': 0}
     )
 
@@ -460,8 +501,7 @@ def main():
         if reputation_data is not None:
             state['reputation'] = reputation_data
 
-        updated_state = tick(json.dumps(state))
-        updated = json.loads(updated_state)
+        updated = tick_dict(state)
 
         # Separate sub-states back out for envelope output
         gardens_out = updated.pop('gardens', None)
@@ -1,8 +1,15 @@
 #!/usr/bin/env python3
 """Reputation engine: compute, decay, and query citizen reputation scores."""
+import bisect
+import functools
+import heapq
 import json
+import os
 import sys
+import tempfile
 import time
+from collections import defaultdict
+from operator import itemgetter
 
 # ---------------------------------------------------------------------------
 # Constants
@@ -22,6 +29,9 @@ TIER_THRESHOLDS = {
 # Tier display order (lowest to highest)
 TIER_ORDER = ['Untrusted', 'Neutral', 'Respected', 'Honored', 'Legendary']
 
+# Sorted tier lower bounds for bisect lookup in get_reputation_tier
+_TIER_LOWER_BOUNDS = [TIER_THRESHOLDS[name][0] for name in TIER_ORDER]
+
 # Decay rate: fraction of (score - neutral_point) removed per real day.
 # A value of 0.05 means 5 % of the excess score decays per day toward 0.
 # This prevents permanent grudges and permanent glory alike.
@@ -42,6 +52,9 @@ MAX_SINGLE_ADJUSTMENT = 100
 # History retention cap per citizen pair (keep last N events in global history).
 MAX_HISTORY_ENTRIES = 1000
 
+# Accepted adjustment amount types (bool is excluded separately)
+_NUMBER_TYPES = (int, float)
+
 
 # ---------------------------------------------------------------------------
 # Tier helpers
@@ -57,12 +70,9 @@ def get_reputation_tier(score):
     Returns:
         One of 'Untrusted', 'Neutral', 'Respected', 'Honored', 'Legendary'
     """
-    for tier_name in TIER_ORDER:
-        low, high = TIER_THRESHOLDS[tier_name]
-        if low <= score < high:
-            return tier_name
-    # score == MAX boundary falls into Legendary
-    return 'Legendary'
+    # Tiers are contiguous, so the tier is the last one whose lower bound is
+    # <= score; anything past the top bound falls into Legendary.
+    return TIER_ORDER[bisect.bisect_right(_TIER_LOWER_BOUNDS, score) - 1]
 
 
 # ---------------------------------------------------------------------------
@@ -85,25 +95,29 @@ def calculate_reputation(history):
     Returns:
         dict mapping target_id -> computed score (float, clamped to bounds)
     """
-    scores = {}
+    totals = defaultdict(int)
     for entry in history:
         target = entry.get('target_id')
-        amount = entry.get('amount', 0)
-        if target is None:
-            continue
-        scores[target] = scores.get(target, 0) + amount
-
-    # Clamp all scores to valid bounds
-    for target in scores:
-        scores[target] = max(MIN_SCORE, min(MAX_SCORE, scores[target]))
+        if target is not None:
+            totals[target] += entry.get('amount', 0)
 
-    return scores
+    # Clamp all scores to valid bounds while copying into a plain dict
+    return {
+        target: max(MIN_SCORE, min(MAX_SCORE, total))
+        for target, total in totals.items()
+    }
 
 
 # ---------------------------------------------------------------------------
 # Decay
 # ---------------------------------------------------------------------------
 
+@functools.lru_cache(maxsize=256)
+def _decay_factor(delta_days):
+    """Return (1 - DECAY_RATE) ** delta_days, cached for repeated deltas."""
+    return (1.0 - DECAY_RATE) ** delta_days
+
+
 def decay_reputation(scores, delta_days):
     """
     Apply gradual decay toward neutral (0) for all citizens.
@@ -124,28 +138,72 @@ def decay_reputation(scores, delta_days):
     if delta_days <= 0:
         return dict(scores)
 
-    decay_factor = (1.0 - DECAY_RATE) ** delta_days
-    decayed = {}
-    for citizen_id, score in scores.items():
-        new_score = score * decay_factor
-        # Clamp to valid range
-        new_score = max(MIN_SCORE, min(MAX_SCORE, new_score))
-        decayed[citizen_id] = new_score
-
-    return decayed
+    if not scores:
+        return {}
+    decay_factor = _decay_factor(delta_days)
+
+    # The factor lies in (0, 1], so decay only shrinks magnitudes: when every
+    # input is already within bounds no output can leave them, and the whole
+    # pass is a single comprehension with no per-citizen clamp.
+    values = scores.values()
+    if MIN_SCORE <= min(values) and max(values) <= MAX_SCORE:
+        return {cid: score * decay_factor for cid, score in scores.items()}
+
+    return {
+        cid: max(MIN_SCORE, min(MAX_SCORE, score * decay_factor))
+        for cid, score in scores.items()
+    }
 
 
 # ---------------------------------------------------------------------------
 # Validation
 # ---------------------------------------------------------------------------
 
-def validate_adjustment(from_id, target_id, amount, history=None):
+def _adjustment_error(from_id, target_id, amount, history, now):
+    """Return the reason an adjustment is invalid, or None if it is valid."""
+    # Self-adjustment check
+    if from_id == target_id:
+        return 'Self-adjustment is not allowed'
+
+    # Type check (bool is an int subclass but not a meaningful amount)
+    if not isinstance(amount, _NUMBER_TYPES) or isinstance(amount, bool):
+        return 'amount must be a number'
+
+    # Magnitude check
+    if abs(amount) > MAX_SINGLE_ADJUSTMENT:
+        return f'amount magnitude exceeds maximum of {MAX_SINGLE_ADJUSTMENT}'
+
+    # Rate-limit check (optional — only when history is provided)
+    if history is not None:
+        # Entries are not guaranteed to be in time order (callers may pass an
+        # explicit `now`), so old entries are skipped rather than ending the
+        # walk; it stops early only once the limit is reached.
+        cutoff = now - 86400  # last 24 hours
+        recent_count = 0
+        for entry in reversed(history):
+            if entry.get('timestamp', 0) < cutoff:
+                continue
+            if entry.get('from_id') == from_id:
+                recent_count += 1
+                if recent_count >= MAX_ADJUSTMENTS_PER_DAY:
+                    break
+        if recent_count >= MAX_ADJUSTMENTS_PER_DAY:
+            return (
+                f'Rate limit exceeded: {from_id} has made '
+                f'{recent_count} adjustments in the last 24 hours '
+                f'(max {MAX_ADJUSTMENTS_PER_DAY})'
+            )
+
+    return None
+
+
+def validate_adjustment(from_id, target_id, amount, history=None, now=None):
     """
     Validate a proposed reputation adjustment before applying it.
 
     Checks:
     - Self-adjustment is forbidden.
-    - amount must be a number.
+    - amount must be a number (not a bool).
     - |amount| must not exceed MAX_SINGLE_ADJUSTMENT.
     - from_id must not exceed MAX_ADJUSTMENTS_PER_DAY in the last 24 hours.
 
@@ -153,81 +211,35 @@ def validate_adjustment(from_id, target_id, amount, history=None):
         from_id: citizen making the adjustment
         target_id: citizen being adjusted
         amount: numeric adjustment value (positive = boost, negative = penalty)
-        history: optional list of past adjustment dicts for rate-limit checking
+        history: optional list of past adjustment dicts for rate-limit
+            checking, in any order; every entry is examined
+        now: Unix timestamp for the rate-limit window (defaults to
+            time.time()); pass one value sampled per tick when validating
+            many adjustments
 
     Returns:
         dict with keys:
             'valid' (bool),
             'error' (str or None)
     """
-    # Self-adjustment check
-    if from_id == target_id:
-        return {'valid': False, 'error': 'Self-adjustment is not allowed'}
-
-    # Type check
-    if not isinstance(amount, (int, float)):
-        return {'valid': False, 'error': 'amount must be a number'}
-
-    # Magnitude check
-    if abs(amount) > MAX_SINGLE_ADJUSTMENT:
-        return {
-            'valid': False,
-            'error': f'amount magnitude exceeds maximum of {MAX_SINGLE_ADJUSTMENT}'
-        }
-
-    # Rate-limit check (optional — only when history is provided)
-    if history is not None:
-        cutoff = time.time() - 86400  # last 24 hours
-        recent_count = sum(
-            1 for entry in history
-            if entry.get('from_id') == from_id
-            and entry.get('timestamp', 0) >= cutoff
-        )
-        if recent_count >= MAX_ADJUSTMENTS_PER_DAY:
-            return {
-                'valid': False,
-                'error': (
-                    f'Rate limit exceeded: {from_id} has made '
-                    f'{recent_count} adjustments in the last 24 hours '
-                    f'(max {MAX_ADJUSTMENTS_PER_DAY})'
-                )
-            }
-
-    return {'valid': True, 'error': None}
+    if now is None:
+        now = time.time()
+    error = _adjustment_error(from_id, target_id, amount, history, now)
+    return {'valid': error is None, 'error': error}
 
 
 # ---------------------------------------------------------------------------
 # Apply adjustment
 # ---------------------------------------------------------------------------
 
-def apply_adjustment(scores, history, from_id, target_id, amount, reason=''):
+def _record_adjustment(scores, history, from_id, target_id, amount, reason, now):
     """
-    Record a reputation adjustment after validation.
-
-    Mutates (and returns) updated copies of scores and history.
-
-    Args:
-        scores: dict mapping citizen_id -> numeric score
-        history: list of past adjustment dicts
-        from_id: citizen making the adjustment
-        target_id: citizen being adjusted
-        amount: numeric adjustment (positive boost, negative penalty)
-        reason: human-readable reason string
+    Apply an already-validated adjustment to scores and history in place.
 
-    Returns:
-        tuple (updated_scores, updated_history, result_dict)
-        result_dict has keys: 'success' (bool), 'error' (str or None),
-            'old_score', 'new_score', 'old_tier', 'new_tier', 'tier_changed'
+    The caller is responsible for keeping history within
+    MAX_HISTORY_ENTRIES.
+    Returns the success result dict.
     """
-    # Validate first
-    check = validate_adjustment(from_id, target_id, amount, history)
-    if not check['valid']:
-        return scores, history, {'success': False, 'error': check['error']}
-
-    # Deep copy inputs to avoid in-place mutation of caller's data
-    scores = dict(scores)
-    history = list(history)
-
     # Initialise target if absent
     old_score = scores.get(target_id, 0)
     old_tier = get_reputation_tier(old_score)
@@ -237,22 +249,17 @@ def apply_adjustment(scores, history, from_id, target_id, amount, reason=''):
 
     scores[target_id] = new_score
 
-    entry = {
+    history.append({
         'from_id': from_id,
         'target_id': target_id,
         'amount': amount,
         'reason': reason,
-        'timestamp': time.time(),
+        'timestamp': now,
         'old_score': old_score,
         'new_score': new_score,
-    }
-    history.append(entry)
+    })
 
-    # Trim history to cap
-    if len(history) > MAX_HISTORY_ENTRIES:
-        history = history[-MAX_HISTORY_ENTRIES:]
-
-    result = {
+    return {
         'success': True,
         'error': None,
         'old_score': old_score,
@@ -262,9 +269,97 @@ def apply_adjustment(scores, history, from_id, target_id, amount, reason=''):
         'tier_changed': old_tier != new_tier,
     }
 
+
+def apply_adjustment(scores, history, from_id, target_id, amount, reason='',
+                     now=None):
+    """
+    Record a reputation adjustment after validation.
+
+    Mutates (and returns) updated copies of scores and history.
+
+    Args:
+        scores: dict mapping citizen_id -> numeric score
+        history: list of past adjustment dicts
+        from_id: citizen making the adjustment
+        target_id: citizen being adjusted
+        amount: numeric adjustment (positive boost, negative penalty)
+        reason: human-readable reason string
+        now: Unix timestamp recorded on the entry and used for the rate-limit
+            window (defaults to time.time())
+
+    Returns:
+        tuple (updated_scores, updated_history, result_dict)
+        result_dict has keys: 'success' (bool), 'error' (str or None),
+            'old_score', 'new_score', 'old_tier', 'new_tier', 'tier_changed'
+    """
+    if now is None:
+        now = time.time()
+
+    # Validate first (the private checker skips building a result dict)
+    error = _adjustment_error(from_id, target_id, amount, history, now)
+    if error is not None:
+        return scores, history, {'success': False, 'error': error}
+
+    # Copy inputs to avoid in-place mutation of caller's data
+    scores = dict(scores)
+    history = list(history)
+    result = _record_adjustment(
+        scores, history, from_id, target_id, amount, reason, now
+    )
+
+    # Cap history size; only slice when the append pushed it over
+    if len(history) > MAX_HISTORY_ENTRIES:
+        history = history[-MAX_HISTORY_ENTRIES:]
+
     return scores, history, result
 
 
+def apply_adjustments(scores, history, adjustments, now=None):
+    """
+    Record a batch of reputation adjustments in order.
+
+    Equivalent to chaining apply_adjustment over each item, but scores and
+    history are copied once for the whole batch instead of once per call.
+    Each adjustment is validated against the history built so far, so rate
+    limits apply within the batch too.
+
+    Args:
+        scores: dict mapping citizen_id -> numeric score
+        history: list of past adjustment dicts
+        adjustments: iterable of (from_id, target_id, amount) or
+            (from_id, target_id, amount, reason) tuples
+        now: Unix timestamp shared by the whole batch (defaults to a single
+            time.time() sample)
+
+    Returns:
+        tuple (updated_scores, updated_history, results)
+        results is a list with one apply_adjustment-style result dict per
+        adjustment, in input order.
+    """
+    if now is None:
+        now = time.time()
+
+    # One copy for the whole batch. The incoming history is validated
+    # untrimmed and trimmed only after each append, exactly as chained
+    # apply_adjustment calls would see it.
+    scores = dict(scores)
+    history = list(history)
+    results = []
+    for from_id, target_id, amount, *rest in adjustments:
+        reason = rest[0] if rest else ''
+        error = _adjustment_error(from_id, target_id, amount, history, now)
+        if error is not None:
+            results.append({'success': False, 'error': error})
+            continue
+        results.append(_record_adjustment(
+            scores, history, from_id, target_id, amount, reason, now
+        ))
+        if len(history) > MAX_HISTORY_ENTRIES:
+            del history[:len(history) - MAX_HISTORY_ENTRIES]
+
+    return scores, history, results
+
+
 # ---------------------------------------------------------------------------
 # Leaderboard
 # ---------------------------------------------------------------------------
@@ -283,11 +378,9 @@ def get_top_citizens(scores, limit=10):
     if not scores:
         return []
 
-    sorted_citizens = sorted(
-        scores.items(),
-        key=lambda kv: kv[1],
-        reverse=True
-    )[:limit]
+    # Partial selection is O(N log limit) instead of a full sort; nlargest
+    # keeps the same stable tie order as sorted(..., reverse=True)[:limit]
+    sorted_citizens = heapq.nlargest(limit, scores.items(), key=itemgetter(1))
 
     return [
         {
@@ -321,6 +414,19 @@ def load_reputation(filepath):
         data.setdefault('scores', {})
         data.setdefault('history', [])
         data.setdefault('lastDecayAt', 0)
+        # Enforce the history cap once here so an oversized file is trimmed
+        # a single time rather than copied through every apply_adjustment.
+        if len(data['history']) > MAX_HISTORY_ENTRIES:
+            data['history'] = data['history'][-MAX_HISTORY_ENTRIES:]
+        # The JSON decoder shares object keys but not string values, so each
+        # entry gets its own copy of every citizen id; intern them so history
+        # holds one string per citizen and id comparisons hit identity first.
+        intern = sys.intern
+        for entry in data['history']:
+            for field in ('from_id', 'target_id'):
+                value = entry.get(field)
+                if type(value) is str:
+                    entry[field] = intern(value)
         return data
     except (FileNotFoundError, json.JSONDecodeError):
         return default
@@ -332,10 +438,32 @@ def save_reputation(filepath, reputation_data):
 
     Args:
         filepath: destination path
-        reputation_data: dict with keys 'scores', 'history', 'lastDecayAt'
+        reputation_data: dict with keys 'scores', 'history', 'lastDecayAt'.
+            'history' may be any sequence, e.g. a deque(maxlen=...) ring
+            buffer held by a long-running caller; it is written as a list.
     """
-    with open(filepath, 'w') as fh:
-        json.dump(reputation_data, fh, indent=2)
+    history = reputation_data.get('history')
+    if history is not None and not isinstance(history, list):
+        reputation_data = dict(reputation_data, history=list(history))
+    # Encode in one call and write once rather than streaming fragments
+    # through json.dump(); the file stays human-readable JSON for git diffs.
+    # Writing to a uniquely named sibling temp file and renaming over the
+    # target means a crash mid-write never leaves a truncated
+    # reputation.json behind, and concurrent writers never share a temp file.
+    text = json.dumps(reputation_data, indent=2)
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(filepath) or '.', suffix='.tmp'
+    )
+    try:
+        with os.fdopen(fd, 'w') as fh:
+            fh.write(text)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
 
 
 def tick_reputation(reputation_data, current_timestamp=None):
@@ -355,18 +483,18 @@ def tick_reputation(reputation_data, current_timestamp=None):
     if current_timestamp is None:
         current_timestamp = time.time()
 
-    last_decay = reputation_data.get('lastDecayAt', 0)
-    delta_seconds = current_timestamp - last_decay
-    delta_days = delta_seconds / 86400.0  # convert to days
+    delta_seconds = current_timestamp - reputation_data.get('lastDecayAt', 0)
 
-    # Only decay if at least 1 hour has elapsed to avoid float noise
-    if delta_days >= (1.0 / 24.0):
-        reputation_data['scores'] = decay_reputation(
-            reputation_data.get('scores', {}),
-            delta_days
-        )
-        reputation_data['lastDecayAt'] = current_timestamp
+    # Only decay if at least 1 hour has elapsed to avoid float noise; most
+    # ticks land here and return the state untouched.
+    if delta_seconds < 3600:
+        return reputation_data
 
+    reputation_data['scores'] = decay_reputation(
+        reputation_data.get('scores', {}),
+        delta_seconds / 86400.0  # convert to days
+    )
+    reputation_data['lastDecayAt'] = current_timestamp
     return reputation_data
 
 
@@ -851,7 +851,8 @@ def forge(spec, output_dir):
 # CLI entry point
 # ---------------------------------------------------------------------------
 
-def main():
+def main(argv=None):
+    """CLI entry point. argv excludes the program name (defaults to sys.argv[1:])."""
     parser = argparse.ArgumentParser(
         description='sim_forge.py — ZION Simulation Forge: generate simulation modules from a spec',
         usage=(
@@ -872,7 +873,7 @@ def main():
         help='Root output directory (default: directory containing this script\'s parent)'
     )
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     # Determine output directory
     if args.output_dir:
@@ -46,12 +46,21 @@ class TestStructureMaintenance(unittest.TestCase):
             }
         return structs
 
+    def _run(self, balances, structures, _proc=process_structure_maintenance):
+        """Build an economy from balances and run maintenance over structures.
+
+        The processor is bound as a default argument so each call resolves it
+        as a local rather than a module global.
+        """
+        economy = self._make_economy(balances)
+        economy, to_remove = _proc(economy, structures)
+        return economy, to_remove
+
     def test_basic_maintenance_deducted(self):
         """Owner with sufficient balance pays 1 Spark maintenance."""
-        economy = self._make_economy({'player1': 10})
         structures = self._make_structures({'s1': 'player1'})
 
-        economy, to_remove = process_structure_maintenance(economy, structures)
+        economy, to_remove = self._run({'player1': 10}, structures)
 
         self.assertEqual(economy['balances']['player1'], 9,
                          'Owner should lose 1 Spark for maintenance')
@@ -60,10 +69,9 @@ class TestStructureMaintenance(unittest.TestCase):
 
     def test_maintenance_creates_ledger_entry(self):
         """Successful maintenance payment creates a ledger entry typed structure_maintenance."""
-        economy = self._make_economy({'player1': 5})
         structures = self._make_structures({'s1': 'player1'})
 
-        economy, _ = process_structure_maintenance(economy, structures)
+        economy, _ = self._run({'player1': 5}, structures)
 
         maint_entries = [e for e in economy['ledger']
                          if e['type'] == 'structure_maintenance']
@@ -77,20 +85,18 @@ class TestStructureMaintenance(unittest.TestCase):
 
     def test_maintenance_spark_destroyed_not_to_treasury(self):
         """Maintenance Spark is destroyed — TREASURY must not increase."""
-        economy = self._make_economy({'player1': 5, TREASURY_ID: 0})
         structures = self._make_structures({'s1': 'player1'})
 
-        economy, _ = process_structure_maintenance(economy, structures)
+        economy, _ = self._run({'player1': 5, TREASURY_ID: 0}, structures)
 
         self.assertEqual(economy['balances'][TREASURY_ID], 0,
                          'TREASURY must not receive maintenance Spark (§6.5.3 — destroy, not redistribute)')
 
     def test_multiple_structures_multiple_deductions(self):
         """Each structure incurs a separate 1 Spark charge."""
-        economy = self._make_economy({'player1': 10})
         structures = self._make_structures({'s1': 'player1', 's2': 'player1', 's3': 'player1'})
 
-        economy, to_remove = process_structure_maintenance(economy, structures)
+        economy, to_remove = self._run({'player1': 10}, structures)
 
         self.assertEqual(economy['balances']['player1'], 7,
                          'Three structures cost 3 Spark total')
@@ -100,13 +106,12 @@ class TestStructureMaintenance(unittest.TestCase):
 
     def test_multiple_owners_each_charged(self):
         """Each structure owner is charged independently."""
-        economy = self._make_economy({'alice': 5, 'bob': 3})
         structures = {
             's_alice': {'type': 'bench', 'builder': 'alice', 'zone': 'nexus', '_missedPayments': 0},
             's_bob': {'type': 'bench', 'builder': 'bob', 'zone': 'nexus', '_missedPayments': 0},
         }
 
-        economy, to_remove = process_structure_maintenance(economy, structures)
+        economy, to_remove = self._run({'alice': 5, 'bob': 3}, structures)
 
         self.assertEqual(economy['balances']['alice'], 4)
         self.assertEqual(economy['balances']['bob'], 2)
@@ -114,11 +119,10 @@ class TestStructureMaintenance(unittest.TestCase):
 
     def test_owner_at_zero_cannot_pay_increments_missed(self):
         """Owner at balance floor (0) cannot pay; missed payment counter increments."""
-        economy = self._make_economy({'broke_player': 0})
         structures = {'s1': {'type': 'bench', 'builder': 'broke_player',
                               'zone': 'nexus', '_missedPayments': 0}}
 
-        economy, to_remove = process_structure_maintenance(economy, structures)
+        economy, to_remove = self._run({'broke_player': 0}, structures)
 
         self.assertEqual(economy['balances']['broke_player'], 0,
                          'Balance should remain at 0 (cannot go negative)')
@@ -129,11 +133,10 @@ class TestStructureMaintenance(unittest.TestCase):
 
     def test_missed_payment_logged_in_ledger(self):
         """Missed maintenance payments are logged in the ledger for transparency."""
-        economy = self._make_economy({'broke_player': 0})
         structures = {'s1': {'type': 'bench', 'builder': 'broke_player',
                               'zone': 'nexus', '_missedPayments': 0}}
 
-        economy, _ = process_structure_maintenance(economy, structures)
+        economy, _ = self._run({'broke_player': 0}, structures)
 
         missed_entries = [e for e in economy['ledger']
                           if e['type'] == 'structure_maintenance_missed']
@@ -143,24 +146,22 @@ class TestStructureMaintenance(unittest.TestCase):
 
     def test_second_missed_payment_marks_for_removal(self):
         """Structure with 2 consecutive missed payments is marked for removal (§6.5.1)."""
-        economy = self._make_economy({'broke_player': 0})
         # Already missed 1 payment
         structures = {'s1': {'type': 'bench', 'builder': 'broke_player',
                               'zone': 'nexus', '_missedPayments': 1}}
 
-        economy, to_remove = process_structure_maintenance(economy, structures)
+        economy, to_remove = self._run({'broke_player': 0}, structures)
 
         self.assertIn('s1', to_remove,
                       'Structure should be flagged for removal after 2nd missed payment')
 
     def test_successful_payment_resets_missed_counter(self):
         """After a successful payment, missed payment counter resets to 0."""
-        economy = self._make_economy({'recovering_player': 5})
         # Had previously missed 1 payment
         structures = {'s1': {'type': 'bench', 'builder': 'recovering_player',
                               'zone': 'nexus', '_missedPayments': 1}}
 
-        economy, to_remove = process_structure_maintenance(economy, structures)
+        economy, to_remove = self._run({'recovering_player': 5}, structures)
 
         self.assertEqual(structures['s1']['_missedPayments'], 0,
                          'Successful payment should reset missed counter to 0')
@@ -169,7 +170,6 @@ class TestStructureMaintenance(unittest.TestCase):
 
     def test_system_owned_structures_not_charged(self):
         """Structures built by 'system' (SYSTEM_ID) are exempt from maintenance."""
-        economy = self._make_economy({'player1': 10})
         structures = {
             's_system': {'type': 'fountain', 'builder': 'system',
                          'zone': 'nexus', '_missedPayments': 0},
@@ -177,7 +177,7 @@ class TestStructureMaintenance(unittest.TestCase):
                          'zone': 'nexus', '_missedPayments': 0},
         }
 
-        economy, to_remove = process_structure_maintenance(economy, structures)
+        economy, to_remove = self._run({'player1': 10}, structures)
 
         # Only player1 charged
         self.assertEqual(economy['balances']['player1'], 9)
@@ -187,9 +187,7 @@ class TestStructureMaintenance(unittest.TestCase):
 
     def test_empty_structures_no_charges(self):
         """No structures means no maintenance charges."""
-        economy = self._make_economy({'player1': 10})
-
-        economy, to_remove = process_structure_maintenance(economy, {})
+        economy, to_remove = self._run({'player1': 10}, {})
 
         self.assertEqual(economy['balances']['player1'], 10)
         self.assertEqual(economy['ledger'], [])
@@ -197,14 +195,13 @@ class TestStructureMaintenance(unittest.TestCase):
 
     def test_unknown_builder_skipped(self):
         """Structures with missing or empty builder field are skipped gracefully."""
-        economy = self._make_economy({'player1': 10})
         structures = {
             's_no_builder': {'type': 'bench', 'zone': 'nexus', '_missedPayments': 0},
             's_empty_builder': {'type': 'bench', 'builder': '', 'zone': 'nexus',
                                 '_missedPayments': 0},
         }
 
-        economy, to_remove = process_structure_maintenance(economy, structures)
+        economy, to_remove = self._run({'player1': 10}, structures)
 
         # No charges applied, no errors
         self.assertEqual(economy['balances']['player1'], 10)
@@ -217,11 +214,10 @@ class TestStructureMaintenance(unittest.TestCase):
 
     def test_exactly_one_spark_balance_pays_successfully(self):
         """Owner with exactly 1 Spark balance can pay maintenance (boundary case)."""
-        economy = self._make_economy({'edge_player': 1})
         structures = {'s1': {'type': 'bench', 'builder': 'edge_player',
                               'zone': 'nexus', '_missedPayments': 0}}
 
-        economy, to_remove = process_structure_maintenance(economy, structures)
+        economy, to_remove = self._run({'edge_player': 1}, structures)
 
         self.assertEqual(economy['balances']['edge_player'], 0,
                          'Balance should go to 0 (not below floor)')
@@ -12,8 +12,12 @@ Covers:
 import unittest
 import sys
 import os
+import io
 import json
+import time
 import tempfile
+import contextlib
+from unittest import mock
 
 # Add scripts directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
@@ -22,11 +26,51 @@ from game_tick import (
     load_state_file,
     decay_pet_states,
     tick,
+    tick_dict,
+    main as game_tick_main,
 )
 
 # Path to state directory
 STATE_DIR = os.path.join(os.path.dirname(__file__), '..', 'state')
 
+# Default sub-states as written by game_tick.main(); shared read-only by tests
+GUILDS_DEFAULT = {'guilds': [], 'invites': [], 'guildMessages': [],
+                  'nextGuildId': 1, 'nextInviteId': 1, 'nextMessageId': 1}
+MENTORING_DEFAULT = {'playerSkills': {}, 'mentorships': {},
+                     'mentorshipOffers': {}, 'npcLessons': {}}
+PETS_DEFAULT = {'playerPets': {}}
+
+# Expected top-level schema of each state file: key -> type
+GUILDS_TYPES = {
+    'guilds': list,
+    'invites': list,
+    'guildMessages': list,
+    'nextGuildId': int,
+    'nextInviteId': int,
+    'nextMessageId': int,
+}
+MENTORING_TYPES = {
+    'playerSkills': dict,
+    'mentorships': dict,
+    'mentorshipOffers': dict,
+    'npcLessons': dict,
+}
+PETS_TYPES = {
+    'playerPets': dict,
+}
+
+
+def schema_errors(data, types):
+    """Validate data against a key->type table in one pass, collecting every error."""
+    errors = []
+    for key, expected in types.items():
+        if key not in data:
+            errors.append(f"Missing key: {key}")
+        elif type(data[key]) is not expected:
+            errors.append(f"Key '{key}' must be {expected.__name__}, "
+                          f"got {type(data[key]).__name__}")
+    return errors
+
 
 # ---------------------------------------------------------------------------
 # State file structure tests
@@ -35,10 +79,20 @@ STATE_DIR = os.path.join(os.path.dirname(__file__), '..', 'state')
 class TestStateFileStructure(unittest.TestCase):
     """Verify the initial JSON state files have the correct schema."""
 
+    STATE_FILES = ('guilds.json', 'mentoring.json', 'pets.json')
+
+    @classmethod
+    def setUpClass(cls):
+        """Parse each state file once; the tests only read the results."""
+        cls._files = {}
+        for filename in cls.STATE_FILES:
+            path = os.path.join(STATE_DIR, filename)
+            if os.path.exists(path):
+                with open(path, 'rb', buffering=65536) as f:
+                    cls._files[filename] = json.load(f)
+
     def _load(self, filename):
-        path = os.path.join(STATE_DIR, filename)
-        with open(path, 'r') as f:
-            return json.load(f)
+        return self._files[filename]
 
     def test_guilds_json_exists(self):
         path = os.path.join(STATE_DIR, 'guilds.json')
@@ -54,53 +108,30 @@ class TestStateFileStructure(unittest.TestCase):
 
     def test_guilds_json_structure(self):
         data = self._load('guilds.json')
-        self.assertIn('guilds', data)
-        self.assertIn('invites', data)
-        self.assertIn('guildMessages', data)
-        self.assertIn('nextGuildId', data)
-        self.assertIn('nextInviteId', data)
-        self.assertIn('nextMessageId', data)
-        self.assertIsInstance(data['guilds'], list)
-        self.assertIsInstance(data['invites'], list)
-        self.assertIsInstance(data['guildMessages'], list)
-        self.assertIsInstance(data['nextGuildId'], int)
-        self.assertIsInstance(data['nextInviteId'], int)
-        self.assertIsInstance(data['nextMessageId'], int)
+        self.assertEqual(schema_errors(data, GUILDS_TYPES), [])
 
     def test_guilds_json_initial_empty_collections(self):
         data = self._load('guilds.json')
-        self.assertEqual(len(data['guilds']), 0)
-        self.assertEqual(len(data['invites']), 0)
-        self.assertEqual(len(data['guildMessages']), 0)
+        self.assertEqual({k: len(data[k]) for k in ('guilds', 'invites', 'guildMessages')},
+                         {'guilds': 0, 'invites': 0, 'guildMessages': 0})
 
     def test_guilds_json_counters_start_at_one(self):
         data = self._load('guilds.json')
-        self.assertEqual(data['nextGuildId'], 1)
-        self.assertEqual(data['nextInviteId'], 1)
-        self.assertEqual(data['nextMessageId'], 1)
+        self.assertEqual({k: data[k] for k in ('nextGuildId', 'nextInviteId', 'nextMessageId')},
+                         {'nextGuildId': 1, 'nextInviteId': 1, 'nextMessageId': 1})
 
     def test_mentoring_json_structure(self):
         data = self._load('mentoring.json')
-        self.assertIn('playerSkills', data)
-        self.assertIn('mentorships', data)
-        self.assertIn('mentorshipOffers', data)
-        self.assertIn('npcLessons', data)
-        self.assertIsInstance(data['playerSkills'], dict)
-        self.assertIsInstance(data['mentorships'], dict)
-        self.assertIsInstance(data['mentorshipOffers'], dict)
-        self.assertIsInstance(data['npcLessons'], dict)
+        self.assertEqual(schema_errors(data, MENTORING_TYPES), [])
 
     def test_mentoring_json_initial_empty_collections(self):
         data = self._load('mentoring.json')
-        self.assertEqual(len(data['playerSkills']), 0)
-        self.assertEqual(len(data['mentorships']), 0)
-        self.assertEqual(len(data['mentorshipOffers']), 0)
-        self.assertEqual(len(data['npcLessons']), 0)
+        self.assertEqual({k: len(data[k]) for k in MENTORING_TYPES},
+                         dict.fromkeys(MENTORING_TYPES, 0))
 
     def test_pets_json_structure(self):
         data = self._load('pets.json')
-        self.assertIn('playerPets', data)
-        self.assertIsInstance(data['playerPets'], dict)
+        self.assertEqual(schema_errors(data, PETS_TYPES), [])
 
     def test_pets_json_initial_empty(self):
         data = self._load('pets.json')
@@ -114,51 +145,46 @@ class TestStateFileStructure(unittest.TestCase):
 class TestLoadStateFile(unittest.TestCase):
     """Test the load_state_file helper function."""
 
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmpdir.cleanup)
+
+    def _write(self, name, text):
+        path = os.path.join(self._tmpdir.name, name)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
     def test_load_valid_json_file(self):
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
-            json.dump({'key': 'value', 'count': 42}, f)
-            fname = f.name
-        try:
-            result = load_state_file(fname, {})
-            self.assertEqual(result['key'], 'value')
-            self.assertEqual(result['count'], 42)
-        finally:
-            os.unlink(fname)
+        fname = self._write('valid.json', json.dumps({'key': 'value', 'count': 42}))
+        result = load_state_file(fname, {})
+        self.assertEqual(result['key'], 'value')
+        self.assertEqual(result['count'], 42)
 
     def test_load_missing_file_returns_default(self):
         result = load_state_file('/nonexistent/path/state.json', {'default': True})
         self.assertEqual(result, {'default': True})
 
     def test_load_invalid_json_returns_default(self):
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
-            f.write('not valid json {{{{')
-            fname = f.name
-        try:
-            result = load_state_file(fname, {'fallback': 99})
-            self.assertEqual(result['fallback'], 99)
-        finally:
-            os.unlink(fname)
+        fname = self._write('invalid.json', 'not valid json {{{{')
+        result = load_state_file(fname, {'fallback': 99})
+        self.assertEqual(result['fallback'], 99)
 
     def test_load_none_path_returns_none(self):
         result = load_state_file(None, {'default': True})
         self.assertIsNone(result)
 
     def test_load_guilds_default(self):
-        default = {'guilds': [], 'invites': [], 'guildMessages': [],
-                   'nextGuildId': 1, 'nextInviteId': 1, 'nextMessageId': 1}
-        result = load_state_file('/no/such/file.json', default)
+        result = load_state_file('/no/such/file.json', GUILDS_DEFAULT)
         self.assertEqual(result['guilds'], [])
         self.assertEqual(result['nextGuildId'], 1)
 
     def test_load_mentoring_default(self):
-        default = {'playerSkills': {}, 'mentorships': {},
-                   'mentorshipOffers': {}, 'npcLessons': {}}
-        result = load_state_file('/no/such/file.json', default)
+        result = load_state_file('/no/such/file.json', MENTORING_DEFAULT)
         self.assertIsInstance(result['playerSkills'], dict)
 
     def test_load_pets_default(self):
-        default = {'playerPets': {}}
-        result = load_state_file('/no/such/file.json', default)
+        result = load_state_file('/no/such/file.json', PETS_DEFAULT)
         self.assertIsInstance(result['playerPets'], dict)
 
 
@@ -181,6 +207,13 @@ class TestDecayPetStates(unittest.TestCase):
             'last_updated': 1000000
         }
 
+    def _assert_all_close(self, actual, expected, atol):
+        """Compare two sequences element-wise within atol in a single assertion."""
+        self.assertEqual(len(actual), len(expected))
+        off = [(i, a, e) for i, (a, e) in enumerate(zip(actual, expected))
+               if abs(a - e) > atol]
+        self.assertEqual(off, [], f'values differ by more than {atol}')
+
     def test_hunger_increases_over_time(self):
         pets_data = {'playerPets': {'player1': self._make_pet(hunger=0)}}
         # 60 seconds = 1 minute, hunger_decay = 1 per minute
@@ -248,9 +281,8 @@ class TestDecayPetStates(unittest.TestCase):
         """Zero time elapsed should not change pet stats."""
         pets_data = {'playerPets': {'player1': self._make_pet(hunger=50, mood=70, bond=30)}}
         result = decay_pet_states(pets_data, 0)
-        self.assertAlmostEqual(result['playerPets']['player1']['hunger'], 50, places=5)
-        self.assertAlmostEqual(result['playerPets']['player1']['mood'], 70, places=5)
-        self.assertAlmostEqual(result['playerPets']['player1']['bond'], 30, places=5)
+        pet = result['playerPets']['player1']
+        self._assert_all_close([pet['hunger'], pet['mood'], pet['bond']], [50, 70, 30], atol=1e-5)
 
     def test_multiple_pets_updated(self):
         pets_data = {
@@ -260,8 +292,8 @@ class TestDecayPetStates(unittest.TestCase):
             }
         }
         result = decay_pet_states(pets_data, 60)
-        self.assertAlmostEqual(result['playerPets']['player1']['hunger'], 1.0, places=2)
-        self.assertAlmostEqual(result['playerPets']['player2']['hunger'], 1.0, places=2)
+        self._assert_all_close([p['hunger'] for p in result['playerPets'].values()],
+                               [1.0, 1.0], atol=1e-2)
 
     def test_empty_pets_no_error(self):
         pets_data = {'playerPets': {}}
@@ -304,10 +336,23 @@ class TestTickWithNewSystems(unittest.TestCase):
             'lastTickAt': 1000.0,
         }
 
+    def _tick_with(self, **sections):
+        """Run tick_dict() on the base state plus the given sub-states."""
+        state = self._base_state()
+        state.update(sections)
+        return tick_dict(state)
+
+    def test_tick_json_wrapper_matches_tick_dict(self):
+        """tick() should be a JSON round-trip around tick_dict()."""
+        # Pin the clock so the time-derived fields agree between the two runs
+        with mock.patch('game_tick.time.time', return_value=5000.0):
+            result = json.loads(tick(json.dumps(self._base_state())))
+            expected = self._tick_with()
+        self.assertEqual(result, expected)
+
     def test_tick_passes_guilds_through(self):
         """tick() should preserve guild data in state."""
-        state = self._base_state()
-        state['guilds'] = {
+        guilds = {
             'guilds': [{'id': 1, 'name': 'Test Guild', 'tag': 'TST'}],
             'invites': [],
             'guildMessages': [],
@@ -315,15 +360,14 @@ class TestTickWithNewSystems(unittest.TestCase):
             'nextInviteId': 1,
             'nextMessageId': 1,
         }
-        result = json.loads(tick(json.dumps(state)))
+        result = self._tick_with(guilds=guilds)
         self.assertIn('guilds', result)
         self.assertEqual(len(result['guilds']['guilds']), 1)
         self.assertEqual(result['guilds']['guilds'][0]['name'], 'Test Guild')
 
     def test_tick_passes_mentoring_through(self):
         """tick() should preserve mentoring data in state."""
-        state = self._base_state()
-        state['mentoring'] = {
+        mentoring = {
             'playerSkills': {
                 'player_abc': {
                     'gardening': {'xp': 150, 'level': 1, 'levelName': 'Sprout'}
@@ -333,7 +377,7 @@ class TestTickWithNewSystems(unittest.TestCase):
             'mentorshipOffers': {},
             'npcLessons': {},
         }
-        result = json.loads(tick(json.dumps(state)))
+        result = self._tick_with(mentoring=mentoring)
         self.assertIn('mentoring', result)
         self.assertIn('player_abc', result['mentoring']['playerSkills'])
         gardening = result['mentoring']['playerSkills']['player_abc']['gardening']
@@ -341,7 +385,6 @@ class TestTickWithNewSystems(unittest.TestCase):
 
     def test_tick_decays_pet_states(self):
         """tick() should run pet decay on the pets sub-state."""
-        import time
         state = self._base_state()
         state['lastTickAt'] = time.time() - 60  # 1 minute ago
         state['pets'] = {
@@ -358,7 +401,7 @@ class TestTickWithNewSystems(unittest.TestCase):
                 }
             }
         }
-        result = json.loads(tick(json.dumps(state)))
+        result = tick_dict(state)
         self.assertIn('pets', result)
         pet = result['pets']['playerPets']['player_xyz']
         # After ~60 seconds, hunger should have increased
@@ -366,8 +409,7 @@ class TestTickWithNewSystems(unittest.TestCase):
 
     def test_tick_with_no_new_systems_still_works(self):
         """tick() should work normally when guilds/mentoring/pets are absent."""
-        state = self._base_state()
-        result = json.loads(tick(json.dumps(state)))
+        result = self._tick_with()
         self.assertIn('worldTime', result)
         self.assertIn('dayPhase', result)
         self.assertNotIn('guilds', result)
@@ -376,8 +418,7 @@ class TestTickWithNewSystems(unittest.TestCase):
 
     def test_tick_guilds_not_mutated_when_no_activity(self):
         """Guild counter values should be preserved unchanged through tick."""
-        state = self._base_state()
-        state['guilds'] = {
+        guilds = {
             'guilds': [],
             'invites': [],
             'guildMessages': [],
@@ -385,16 +426,14 @@ class TestTickWithNewSystems(unittest.TestCase):
             'nextInviteId': 3,
             'nextMessageId': 7,
         }
-        result = json.loads(tick(json.dumps(state)))
+        result = self._tick_with(guilds=guilds)
         g = result['guilds']
-        self.assertEqual(g['nextGuildId'], 5)
-        self.assertEqual(g['nextInviteId'], 3)
-        self.assertEqual(g['nextMessageId'], 7)
+        self.assertEqual({k: g[k] for k in ('nextGuildId', 'nextInviteId', 'nextMessageId')},
+                         {'nextGuildId': 5, 'nextInviteId': 3, 'nextMessageId': 7})
 
     def test_tick_mentoring_preserves_multiple_players(self):
         """All player skill records should survive a tick."""
-        state = self._base_state()
-        state['mentoring'] = {
+        mentoring = {
             'playerSkills': {
                 'alice': {'crafting': {'xp': 300, 'level': 2, 'levelName': 'Journeyman'}},
                 'bob': {'exploration': {'xp': 50, 'level': 0, 'levelName': 'Wanderer'}},
@@ -405,14 +444,14 @@ class TestTickWithNewSystems(unittest.TestCase):
             'mentorshipOffers': {},
             'npcLessons': {},
         }
-        result = json.loads(tick(json.dumps(state)))
+        result = self._tick_with(mentoring=mentoring)
         skills = result['mentoring']['playerSkills']
-        self.assertIn('alice', skills)
-        self.assertIn('bob', skills)
-        self.assertEqual(skills['alice']['crafting']['xp'], 300)
+        self.assertEqual(
+            {pid: {skill: rec['xp'] for skill, rec in s.items()} for pid, s in skills.items()},
+            {'alice': {'crafting': 300}, 'bob': {'exploration': 50}})
         mentorships = result['mentoring']['mentorships']
-        self.assertIn('m_001', mentorships)
-        self.assertEqual(mentorships['m_001']['stepsCompleted'], 2)
+        self.assertEqual({mid: m['stepsCompleted'] for mid, m in mentorships.items()},
+                         {'m_001': 2})
 
 
 # ---------------------------------------------------------------------------
@@ -422,61 +461,75 @@ class TestTickWithNewSystems(unittest.TestCase):
 class TestMainEnvelopeOutput(unittest.TestCase):
     """Test that main() produces correct envelope output for all new state files."""
 
+    def _run_main(self, args):
+        """
+        Helper: run game_tick.main() in-process with the given file arguments,
+        return parsed JSON output.
+        """
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            with self.assertRaises(SystemExit) as cm:
+                game_tick_main(['game_tick.py'] + args)
+        self.assertEqual(cm.exception.code, 0,
+                         f"game_tick.main() failed:\nstdout: {stdout.getvalue()}\n"
+                         f"stderr: {stderr.getvalue()}")
+        return json.loads(stdout.getvalue())
+
+    DEFAULTS = {
+        'gardens': {},
+        'economy': {},
+        'guilds': GUILDS_DEFAULT,
+        'mentoring': MENTORING_DEFAULT,
+        'pets': PETS_DEFAULT,
+    }
+
+    @classmethod
+    def setUpClass(cls):
+        """Write the default state files once into a shared temp directory."""
+        cls._tmpdir = tempfile.TemporaryDirectory()
+        cls._default_paths = {}
+        for kind, data in cls.DEFAULTS.items():
+            path = os.path.join(cls._tmpdir.name, f'{kind}_default.json')
+            with open(path, 'w') as f:
+                f.write(json.dumps(data))
+            cls._default_paths[kind] = path
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._tmpdir.cleanup()
+
+    def _write_temp(self, kind, data):
+        """Write a per-test state file into the shared temp directory."""
+        path = os.path.join(self._tmpdir.name, f'{self._testMethodName}_{kind}.json')
+        with open(path, 'w') as f:
+            f.write(json.dumps(data))
+        return path
+
     def _run_tick_with_files(self, world, gardens=None, economy=None,
                               guilds=None, mentoring=None, pets=None):
         """
-        Helper: write temp state files, run game_tick.main() via subprocess,
-        return parsed JSON output.
+        Helper: write temp state files, run game_tick.main() in-process,
+        return parsed JSON output. Sub-states left as None reuse the
+        pre-built default files from setUpClass.
         """
-        import subprocess
-        files = []
-
-        def write_temp(data):
-            f = tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False)
-            json.dump(data, f)
-            f.close()
-            files.append(f.name)
-            return f.name
-
-        try:
-            world_file = write_temp(world)
-            args = [sys.executable,
-                    os.path.join(os.path.dirname(__file__), '..', 'scripts', 'game_tick.py'),
-                    world_file]
-
-            if gardens is not None or economy is not None or guilds is not None \
-                    or mentoring is not None or pets is not None:
-                gardens_file = write_temp(gardens if gardens is not None else {})
-                args.append(gardens_file)
-
-                economy_file = write_temp(economy if economy is not None else {})
-                args.append(economy_file)
-
-                if guilds is not None or mentoring is not None or pets is not None:
-                    guilds_file = write_temp(guilds if guilds is not None else
-                                             {'guilds': [], 'invites': [],
-                                              'guildMessages': [], 'nextGuildId': 1,
-                                              'nextInviteId': 1, 'nextMessageId': 1})
-                    args.append(guilds_file)
-
-                    mentoring_file = write_temp(mentoring if mentoring is not None else
-                                                {'playerSkills': {}, 'mentorships': {},
-                                                 'mentorshipOffers': {}, 'npcLessons': {}})
-                    args.append(mentoring_file)
-
-                    pets_file = write_temp(pets if pets is not None else {'playerPets': {}})
-                    args.append(pets_file)
-
-            proc = subprocess.run(args, capture_output=True, text=True)
-            self.assertEqual(proc.returncode, 0,
-                             f"game_tick.py failed:\nstdout: {proc.stdout}\nstderr: {proc.stderr}")
-            return json.loads(proc.stdout)
-        finally:
-            for f in files:
-                try:
-                    os.unlink(f)
-                except OSError:
-                    pass
+        def path_for(kind, data):
+            if data is None:
+                return self._default_paths[kind]
+            return self._write_temp(kind, data)
+
+        args = [self._write_temp('world', world)]
+
+        if gardens is not None or economy is not None or guilds is not None \
+                or mentoring is not None or pets is not None:
+            args.append(path_for('gardens', gardens))
+            args.append(path_for('economy', economy))
+
+            if guilds is not None or mentoring is not None or pets is not None:
+                args.append(path_for('guilds', guilds))
+                args.append(path_for('mentoring', mentoring))
+                args.append(path_for('pets', pets))
+
+        return self._run_main(args)
 
     def _base_world(self):
         return {'worldTime': 720, 'lastTickAt': 1000.0}
@@ -486,26 +539,15 @@ class TestMainEnvelopeOutput(unittest.TestCase):
         self.assertIn('world', output)
 
     def test_output_contains_guilds_key_when_provided(self):
-        guilds = {'guilds': [], 'invites': [], 'guildMessages': [],
-                  'nextGuildId': 1, 'nextInviteId': 1, 'nextMessageId': 1}
-        output = self._run_tick_with_files(
-            self._base_world(), guilds=guilds
-        )
+        output = self._run_tick_with_files(self._base_world(), guilds=GUILDS_DEFAULT)
         self.assertIn('guilds', output)
 
     def test_output_contains_mentoring_key_when_provided(self):
-        mentoring = {'playerSkills': {}, 'mentorships': {},
-                     'mentorshipOffers': {}, 'npcLessons': {}}
-        output = self._run_tick_with_files(
-            self._base_world(), mentoring=mentoring
-        )
+        output = self._run_tick_with_files(self._base_world(), mentoring=MENTORING_DEFAULT)
         self.assertIn('mentoring', output)
 
     def test_output_contains_pets_key_when_provided(self):
-        pets = {'playerPets': {}}
-        output = self._run_tick_with_files(
-            self._base_world(), pets=pets
-        )
+        output = self._run_tick_with_files(self._base_world(), pets=PETS_DEFAULT)
         self.assertIn('pets', output)
 
     def test_guilds_data_preserved_in_output(self):
@@ -519,9 +561,8 @@ class TestMainEnvelopeOutput(unittest.TestCase):
         }
         output = self._run_tick_with_files(self._base_world(), guilds=guilds)
         out_guilds = output['guilds']
-        self.assertEqual(len(out_guilds['guilds']), 1)
-        self.assertEqual(out_guilds['guilds'][0]['name'], 'The Builders')
-        self.assertEqual(out_guilds['nextGuildId'], 2)
+        self.assertEqual(([g['name'] for g in out_guilds['guilds']], out_guilds['nextGuildId']),
+                         (['The Builders'], 2))
 
     def test_mentoring_data_preserved_in_output(self):
         mentoring = {
@@ -561,61 +602,39 @@ class TestMainEnvelopeOutput(unittest.TestCase):
 
     def test_missing_state_files_use_defaults_gracefully(self):
         """If state files are missing, game_tick should use defaults and not crash."""
-        import subprocess
-        world_file = None
-        try:
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
-                json.dump(self._base_world(), f)
-                world_file = f.name
-
-            # Provide nonexistent paths for the extra files
-            args = [
-                sys.executable,
-                os.path.join(os.path.dirname(__file__), '..', 'scripts', 'game_tick.py'),
-                world_file,
-                '/no/such/gardens.json',
-                '/no/such/economy.json',
-                '/no/such/guilds.json',
-                '/no/such/mentoring.json',
-                '/no/such/pets.json',
-            ]
-            proc = subprocess.run(args, capture_output=True, text=True)
-            self.assertEqual(proc.returncode, 0,
-                             f"Should handle missing files gracefully.\nstderr: {proc.stderr}")
-            output = json.loads(proc.stdout)
-            self.assertIn('world', output)
-            # guilds/mentoring/pets should be present with defaults
-            self.assertIn('guilds', output)
-            self.assertIn('mentoring', output)
-            self.assertIn('pets', output)
-        finally:
-            if world_file:
-                try:
-                    os.unlink(world_file)
-                except OSError:
-                    pass
+        world_file = self._write_temp('world', self._base_world())
+
+        # Provide nonexistent paths for the extra files
+        output = self._run_main([
+            world_file,
+            '/no/such/gardens.json',
+            '/no/such/economy.json',
+            '/no/such/guilds.json',
+            '/no/such/mentoring.json',
+            '/no/such/pets.json',
+        ])
+        self.assertIn('world', output)
+        # guilds/mentoring/pets should be present with defaults
+        self.assertIn('guilds', output)
+        self.assertIn('mentoring', output)
+        self.assertIn('pets', output)
 
     def test_no_world_key_in_guilds_output(self):
         """guilds output should not be nested inside 'world'."""
-        guilds = {'guilds': [], 'invites': [], 'guildMessages': [],
-                  'nextGuildId': 1, 'nextInviteId': 1, 'nextMessageId': 1}
-        output = self._run_tick_with_files(self._base_world(), guilds=guilds)
+        output = self._run_tick_with_files(self._base_world(), guilds=GUILDS_DEFAULT)
         # 'guilds' should be a top-level key, not inside 'world'
         self.assertNotIn('guilds', output.get('world', {}))
         self.assertIn('guilds', output)
 
     def test_no_world_key_in_mentoring_output(self):
         """mentoring output should not be nested inside 'world'."""
-        mentoring = {'playerSkills': {}, 'mentorships': {},
-                     'mentorshipOffers': {}, 'npcLessons': {}}
-        output = self._run_tick_with_files(self._base_world(), mentoring=mentoring)
+        output = self._run_tick_with_files(self._base_world(), mentoring=MENTORING_DEFAULT)
         self.assertNotIn('mentoring', output.get('world', {}))
         self.assertIn('mentoring', output)
 
     def test_no_world_key_in_pets_output(self):
         """pets output should not be nested inside 'world'."""
-        pets = {'playerPets': {}}
-        output = self._run_tick_with_files(self._base_world(), pets=pets)
+        output = self._run_tick_with_files(self._base_world(), pets=PETS_DEFAULT)
         self.assertNotIn('pets', output.get('world', {}))
         self.assertIn('pets', output)
 
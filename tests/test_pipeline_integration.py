@@ -17,19 +17,21 @@ import sys
 import tempfile
 import time
 import unittest
+from unittest import mock
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
 from api_process_inbox import (
     validate_message, check_api_restrictions, check_rate_limit,
-    apply_to_state, process_inbox, load_json, save_json,
+    apply_to_state, process_inbox, load_json, save_json, spend_rate_token,
+    _parse_filename_timestamp,
     API_ALLOWED_TYPES, MESSAGE_TYPES
 )
 from agent_autonomy import generate_agent_intentions, activate_agents
 
 
-def make_state_dir():
-    """Create a temp state dir with minimal JSON files."""
-    d = tempfile.mkdtemp()
+# Fixture files encoded once at import; make_state_dir only writes bytes
+_FIXTURES = [
+    (name, json.dumps(content).encode('utf-8'))
     for name, content in [
         ('world.json', {'worldTime': 100, 'dayPhase': 'day', 'citizens': {}}),
         ('economy.json', {'balances': {}, 'transactions': [], 'listings': []}),
@@ -38,10 +40,31 @@ def make_state_dir():
         ('players.json', {'players': {}}),
         ('discoveries.json', {'discoveries': {}}),
         ('actions.json', {'actions': []}),
-    ]:
-        with open(os.path.join(d, name), 'w') as f:
-            json.dump(content, f)
-    os.makedirs(os.path.join(d, 'inbox', '_processed'), exist_ok=True)
+    ]
+]
+
+
+def write_blobs(directory, blobs):
+    """Write (filename, bytes) pairs with one os.write per file."""
+    for name, blob in blobs:
+        fd = os.open(os.path.join(directory, name), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.write(fd, blob)
+        finally:
+            os.close(fd)
+
+
+def drop_messages(inbox_dir, named_messages):
+    """Encode all (filename, message) pairs first, then write them in one tight loop."""
+    write_blobs(inbox_dir, [(name, json.dumps(msg).encode('utf-8'))
+                            for name, msg in named_messages])
+
+
+def make_state_dir():
+    """Create a temp state dir with minimal JSON files."""
+    d = tempfile.mkdtemp()
+    write_blobs(d, _FIXTURES)
+    os.makedirs(os.path.join(d, 'inbox', '_processed'))
     return d
 
 
@@ -109,15 +132,15 @@ class TestInspectTeachHandling(unittest.TestCase):
         msg = make_msg('inspect', payload={'target': 'ancient_tree'})
         apply_to_state(msg, self.state_dir)
         changes = load_json(os.path.join(self.state_dir, 'changes.json'))
-        found = any(c['type'] == 'inspect' for c in changes.get('changes', []))
-        self.assertTrue(found, 'inspect should be recorded in changes.json')
+        types = {c['type'] for c in changes.get('changes', [])}
+        self.assertIn('inspect', types, 'inspect should be recorded in changes.json')
 
     def test_teach_records_in_changes(self):
         msg = make_msg('teach', payload={'skill': 'foraging'})
         apply_to_state(msg, self.state_dir)
         changes = load_json(os.path.join(self.state_dir, 'changes.json'))
-        found = any(c['type'] == 'teach' for c in changes.get('changes', []))
-        self.assertTrue(found, 'teach should be recorded in changes.json')
+        types = {c['type'] for c in changes.get('changes', [])}
+        self.assertIn('teach', types, 'teach should be recorded in changes.json')
 
 
 # ─── Rate Limiting ────────────────────────────────────────────
@@ -154,16 +177,139 @@ class TestRateLimiting(unittest.TestCase):
     def test_old_files_not_counted(self):
         """Files with old mtime should not count toward rate limit."""
         processed_dir = os.path.join(self.state_dir, 'inbox', '_processed')
+        first = os.path.join(processed_dir, 'agent_old_20260217210000_00.json')
+        with open(first, 'w') as f:
+            json.dump({}, f)
         old_time = time.time() - 7200  # 2 hours ago
-        for i in range(31):
-            fname = 'agent_old_%s_%02d.json' % ('20260217210000', i)
-            fpath = os.path.join(processed_dir, fname)
-            with open(fpath, 'w') as f:
-                json.dump({}, f)
-            os.utime(fpath, (old_time, old_time))
+        os.utime(first, (old_time, old_time))
+        # Hardlinks share the first file's inode, and with it the old mtime
+        for i in range(1, 31):
+            os.link(first, os.path.join(processed_dir,
+                                        'agent_old_20260217210000_%02d.json' % i))
         allowed, reason = check_rate_limit('agent_old', self.state_dir)
         self.assertTrue(allowed, 'Old files should not trigger rate limit')
 
+    def test_filename_timestamp_wins_over_mtime(self):
+        """Old filename timestamps are not counted even when mtime is fresh."""
+        processed_dir = os.path.join(self.state_dir, 'inbox', '_processed')
+        for i in range(31):
+            fname = 'agent_stale_%s_%02d.json' % ('20260217210000', i)
+            with open(os.path.join(processed_dir, fname), 'w') as f:
+                json.dump({}, f)
+        allowed, reason = check_rate_limit('agent_stale', self.state_dir)
+        self.assertTrue(allowed, 'Filename timestamps should override file mtime')
+
+    def test_unparseable_filename_dates_return_none(self):
+        for stamp in ('00000101000000', '20260231000000', '20250229120000'):
+            with self.subTest(stamp=stamp):
+                self.assertIsNone(_parse_filename_timestamp(
+                    'agent_x_%s_00.json' % stamp, 'agent_x'))
+        self.assertIsNotNone(_parse_filename_timestamp(
+            'agent_x_20240229120000_00.json', 'agent_x'))
+
+    def test_invalid_filename_dates_fall_back_to_mtime(self):
+        """A year-0000 or Feb 31 name must not crash the scan; mtime counts instead."""
+        processed_dir = os.path.join(self.state_dir, 'inbox', '_processed')
+        for i in range(31):
+            stamp = '00000101000000' if i % 2 else '20260231000000'
+            fname = 'agent_baddate_%s_%02d.json' % (stamp, i)
+            with open(os.path.join(processed_dir, fname), 'w') as f:
+                json.dump({}, f)
+        allowed, reason = check_rate_limit('agent_baddate', self.state_dir)
+        self.assertFalse(allowed, 'Fresh mtimes should count when the name has no valid date')
+
+
+class TestRateLimitBucket(unittest.TestCase):
+    """RATE_LIMIT_MODE=bucket uses a per-agent token bucket instead of a scan."""
+
+    def setUp(self):
+        self.state_dir = make_state_dir()
+        patcher = mock.patch.dict(os.environ, {'RATE_LIMIT_MODE': 'bucket'})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.state_dir)
+
+    def test_fresh_agent_allowed_and_bucket_written(self):
+        allowed, reason = check_rate_limit('agent_new', self.state_dir)
+        self.assertTrue(allowed, reason)
+        bucket_path = os.path.join(self.state_dir, 'rate', 'agent_new.json')
+        self.assertFalse(os.path.exists(bucket_path), 'A check alone must not spend a token')
+        spend_rate_token('agent_new', self.state_dir)
+        self.assertAlmostEqual(load_json(bucket_path)['tokens'], 29, places=2)
+
+    def test_exhausted_bucket_rejects(self):
+        results = []
+        for _ in range(31):
+            allowed, _ = check_rate_limit('agent_burst', self.state_dir)
+            results.append(allowed)
+            if allowed:
+                spend_rate_token('agent_burst', self.state_dir)
+        self.assertEqual(results.count(True), 30)
+        self.assertFalse(results[-1])
+
+    def test_path_traversal_sender_rejected(self):
+        for name in ('../../escaped', '..', 'a/b', 'a\\b'):
+            with self.subTest(name=name):
+                allowed, reason = check_rate_limit(name, self.state_dir)
+                self.assertFalse(allowed)
+                self.assertIn('Invalid agent name', reason)
+                spend_rate_token(name, self.state_dir)
+        parent = os.path.dirname(self.state_dir)
+        self.assertFalse(os.path.exists(os.path.join(parent, 'escaped.json')))
+        self.assertFalse(os.path.exists(os.path.join(self.state_dir, 'escaped.json')))
+
+    def test_failed_apply_does_not_spend_token(self):
+        inbox_dir = os.path.join(self.state_dir, 'inbox')
+        drop_messages(inbox_dir, [('fail.json', make_msg('join', sender='agent_fail'))])
+        with mock.patch('api_process_inbox.apply_to_state', side_effect=RuntimeError('boom')):
+            results = process_inbox(self.state_dir)
+        self.assertEqual(results['rejected'], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.state_dir, 'rate', 'agent_fail.json')))
+
+    def test_applied_message_spends_token(self):
+        inbox_dir = os.path.join(self.state_dir, 'inbox')
+        drop_messages(inbox_dir, [('ok.json', make_msg('join', sender='agent_ok'))])
+        results = process_inbox(self.state_dir)
+        self.assertEqual(results['processed'], 1)
+        bucket = load_json(os.path.join(self.state_dir, 'rate', 'agent_ok.json'))
+        self.assertAlmostEqual(bucket['tokens'], 29, places=2)
+
+    def test_bucket_write_failure_recorded_not_fatal(self):
+        inbox_dir = os.path.join(self.state_dir, 'inbox')
+        drop_messages(inbox_dir, [('ok.json', make_msg('join', sender='agent_disk'))])
+        with mock.patch('api_process_inbox.spend_rate_token',
+                        side_effect=OSError('disk full')):
+            results = process_inbox(self.state_dir)
+        self.assertEqual(results['processed'], 1)
+        self.assertTrue(any('rate bucket error' in e for e in results['errors']))
+        self.assertTrue(os.path.exists(os.path.join(inbox_dir, '_processed', 'ok.json')))
+
+    def test_bucket_temp_file_removed_on_failed_write(self):
+        with mock.patch('api_process_inbox.os.replace', side_effect=OSError('boom')):
+            with self.assertRaises(OSError):
+                spend_rate_token('agent_tmp', self.state_dir)
+        self.assertEqual(os.listdir(os.path.join(self.state_dir, 'rate')), [])
+
+    def test_failed_move_does_not_leave_message_for_replay(self):
+        inbox_dir = os.path.join(self.state_dir, 'inbox')
+        drop_messages(inbox_dir, [('stuck.json', make_msg('join', sender='agent_stuck'))])
+        with mock.patch('api_process_inbox.shutil.move', side_effect=OSError('ro fs')):
+            results = process_inbox(self.state_dir)
+        self.assertEqual(results['processed'], 1)
+        self.assertTrue(any('move error' in e for e in results['errors']))
+        self.assertFalse(os.path.exists(os.path.join(inbox_dir, 'stuck.json')))
+        self.assertEqual(process_inbox(self.state_dir)['processed'], 0)
+
+    def test_bucket_refills_over_time(self):
+        rate_dir = os.path.join(self.state_dir, 'rate')
+        os.makedirs(rate_dir)
+        save_json(os.path.join(rate_dir, 'agent_idle.json'),
+                  {'tokens': 0, 'last': time.time() - 3600})
+        allowed, reason = check_rate_limit('agent_idle', self.state_dir)
+        self.assertTrue(allowed, 'An hour idle should refill the bucket: %s' % reason)
+
 
 # ─── Agent Autonomy Output Validation ────────────────────────
 
@@ -191,9 +337,9 @@ class TestAgentAutonomyOutput(unittest.TestCase):
             'position': {'x': 0, 'y': 0, 'z': 0, 'zone': 'wilds'},
         }
         messages = generate_agent_intentions(agent, 3, inject_join=True)
-        for msg in messages:
-            self.assertIn(msg['type'], API_ALLOWED_TYPES,
-                          'Type "%s" not in API_ALLOWED_TYPES' % msg['type'])
+        types = {msg['type'] for msg in messages}
+        self.assertTrue(types.issubset(API_ALLOWED_TYPES),
+                        'Types not in API_ALLOWED_TYPES: %s' % (types - API_ALLOWED_TYPES))
 
     def test_agent_says_have_text(self):
         agent = {
@@ -209,12 +355,14 @@ class TestAgentAutonomyOutput(unittest.TestCase):
                                 'say messages must have non-empty text')
 
     def test_activate_agents_produces_valid_messages(self):
+        archetypes = ('gardener', 'builder', 'merchant')
+        intentions = ['say', 'plant', 'harvest', 'build', 'craft']
         agents_data = {
             'agents': [
                 {
                     'id': 'agent_%03d' % i,
-                    'archetype': ['gardener', 'builder', 'merchant'][i % 3],
-                    'intentions': ['say', 'plant', 'harvest', 'build', 'craft'],
+                    'archetype': archetypes[i % 3],
+                    'intentions': intentions,
                     'position': {'x': i, 'y': 0, 'z': i, 'zone': 'nexus'},
                 }
                 for i in range(20)
@@ -232,18 +380,19 @@ class TestAgentAutonomyOutput(unittest.TestCase):
         archetypes = ['gardener', 'builder', 'storyteller', 'merchant',
                       'explorer', 'teacher', 'musician', 'healer',
                       'philosopher', 'artist']
+        base_agent = {
+            'intentions': ['say', 'emote'],
+            'position': {'x': 0, 'y': 0, 'z': 0, 'zone': 'nexus'},
+        }
         for archetype in archetypes:
-            agent = {
-                'id': 'agent_test_%s' % archetype,
-                'archetype': archetype,
-                'intentions': ['say', 'emote'],
-                'position': {'x': 0, 'y': 0, 'z': 0, 'zone': 'nexus'},
-            }
-            messages = generate_agent_intentions(agent, 2, inject_join=True)
-            for msg in messages:
-                valid, errors = validate_message(msg)
-                self.assertTrue(valid,
-                                '%s archetype message invalid: %s' % (archetype, errors))
+            with self.subTest(archetype=archetype):
+                agent = dict(base_agent, id='agent_test_%s' % archetype,
+                             archetype=archetype)
+                messages = generate_agent_intentions(agent, 2, inject_join=True)
+                for msg in messages:
+                    valid, errors = validate_message(msg)
+                    self.assertTrue(valid,
+                                    '%s archetype message invalid: %s' % (archetype, errors))
 
 
 # ─── Dict-Type Guards (Regression) ───────────────────────────
@@ -321,9 +470,8 @@ class TestFullPipeline(unittest.TestCase):
         for i, msg in enumerate(messages):
             msg['id'] = 'agent_pipeline_test_%02d' % i
             msg['seq'] = i
-            fname = 'agent_pipeline_20260217230000_%02d.json' % i
-            with open(os.path.join(inbox_dir, fname), 'w') as f:
-                json.dump(msg, f)
+        drop_messages(inbox_dir, [('agent_pipeline_20260217230000_%02d.json' % i, msg)
+                                  for i, msg in enumerate(messages)])
 
         # Process
         results = process_inbox(self.state_dir)
@@ -345,8 +493,7 @@ class TestFullPipeline(unittest.TestCase):
         inbox_dir = os.path.join(self.state_dir, 'inbox')
         bad_msg = make_msg('say', payload={'text': 'bad'})
         bad_msg['v'] = 99
-        with open(os.path.join(inbox_dir, 'bad_version.json'), 'w') as f:
-            json.dump(bad_msg, f)
+        drop_messages(inbox_dir, [('bad_version.json', bad_msg)])
         results = process_inbox(self.state_dir)
         self.assertEqual(results['rejected'], 1)
         self.assertEqual(results['processed'], 0)
@@ -354,8 +501,7 @@ class TestFullPipeline(unittest.TestCase):
     def test_pipeline_moves_processed_files(self):
         inbox_dir = os.path.join(self.state_dir, 'inbox')
         msg = make_msg('join', sender='agent_move_test')
-        with open(os.path.join(inbox_dir, 'move_test.json'), 'w') as f:
-            json.dump(msg, f)
+        drop_messages(inbox_dir, [('move_test.json', msg)])
         process_inbox(self.state_dir)
         # Original should be gone
         self.assertFalse(os.path.exists(os.path.join(inbox_dir, 'move_test.json')))
@@ -375,9 +521,9 @@ class TestProtocolCompleteness(unittest.TestCase):
     """API_ALLOWED_TYPES should be a subset of MESSAGE_TYPES."""
 
     def test_allowed_types_subset_of_message_types(self):
-        invalid = API_ALLOWED_TYPES - MESSAGE_TYPES
-        self.assertEqual(len(invalid), 0,
-                         'API_ALLOWED_TYPES has types not in MESSAGE_TYPES: %s' % invalid)
+        self.assertTrue(API_ALLOWED_TYPES.issubset(MESSAGE_TYPES),
+                        'API_ALLOWED_TYPES has types not in MESSAGE_TYPES: %s'
+                        % (API_ALLOWED_TYPES - MESSAGE_TYPES))
 
 
 if __name__ == '__main__':
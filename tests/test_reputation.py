@@ -7,6 +7,8 @@ import sys
 import tempfile
 import time
 import unittest
+from unittest import mock
+from collections import deque
 
 # Add scripts directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
@@ -21,6 +23,7 @@ from reputation_engine import (
     TIER_ORDER,
     TIER_THRESHOLDS,
     apply_adjustment,
+    apply_adjustments,
     calculate_reputation,
     decay_reputation,
     get_reputation_tier,
@@ -84,44 +87,27 @@ class TestTierThresholds(unittest.TestCase):
 class TestGetReputationTier(unittest.TestCase):
     """Tests for tier mapping."""
 
-    def test_negative_score_is_untrusted(self):
-        self.assertEqual(get_reputation_tier(-100), 'Untrusted')
-
-    def test_minus_one_is_untrusted(self):
-        self.assertEqual(get_reputation_tier(-1), 'Untrusted')
-
-    def test_zero_is_neutral(self):
-        self.assertEqual(get_reputation_tier(0), 'Neutral')
-
-    def test_fifty_is_neutral(self):
-        self.assertEqual(get_reputation_tier(50), 'Neutral')
-
-    def test_99_is_neutral(self):
-        self.assertEqual(get_reputation_tier(99), 'Neutral')
-
-    def test_100_is_respected(self):
-        self.assertEqual(get_reputation_tier(100), 'Respected')
-
-    def test_300_is_respected(self):
-        self.assertEqual(get_reputation_tier(300), 'Respected')
-
-    def test_499_is_respected(self):
-        self.assertEqual(get_reputation_tier(499), 'Respected')
-
-    def test_500_is_honored(self):
-        self.assertEqual(get_reputation_tier(500), 'Honored')
-
-    def test_1000_is_honored(self):
-        self.assertEqual(get_reputation_tier(1000), 'Honored')
-
-    def test_1499_is_honored(self):
-        self.assertEqual(get_reputation_tier(1499), 'Honored')
-
-    def test_1500_is_legendary(self):
-        self.assertEqual(get_reputation_tier(1500), 'Legendary')
-
-    def test_large_score_is_legendary(self):
-        self.assertEqual(get_reputation_tier(99999), 'Legendary')
+    # (score, expected tier): boundaries on both sides of every threshold
+    CASES = [
+        (-100, 'Untrusted'),
+        (-1, 'Untrusted'),
+        (0, 'Neutral'),
+        (50, 'Neutral'),
+        (99, 'Neutral'),
+        (100, 'Respected'),
+        (300, 'Respected'),
+        (499, 'Respected'),
+        (500, 'Honored'),
+        (1000, 'Honored'),
+        (1499, 'Honored'),
+        (1500, 'Legendary'),
+        (99999, 'Legendary'),
+    ]
+
+    def test_score_to_tier(self):
+        for score, tier in self.CASES:
+            with self.subTest(score=score):
+                self.assertEqual(get_reputation_tier(score), tier)
 
 
 # ===========================================================================
@@ -238,6 +224,13 @@ class TestDecayReputation(unittest.TestCase):
         result = decay_reputation(scores, 1)
         self.assertGreaterEqual(result['bob'], MIN_SCORE)
 
+    def test_out_of_range_input_is_clamped(self):
+        scores = {'alice': MAX_SCORE * 4, 'bob': MIN_SCORE * 4, 'carol': 200}
+        result = decay_reputation(scores, 1)
+        self.assertEqual(result['alice'], MAX_SCORE)
+        self.assertEqual(result['bob'], MIN_SCORE)
+        self.assertAlmostEqual(result['carol'], 200 * (1.0 - DECAY_RATE), places=5)
+
     def test_input_dict_not_mutated(self):
         scores = {'alice': 500}
         original = dict(scores)
@@ -286,6 +279,11 @@ class TestValidateAdjustment(unittest.TestCase):
         result = validate_adjustment('alice', 'bob', 'ten')
         self.assertFalse(result['valid'])
 
+    def test_bool_amount_rejected(self):
+        result = validate_adjustment('alice', 'bob', True)
+        self.assertFalse(result['valid'])
+        self.assertEqual(result['error'], 'amount must be a number')
+
     def test_none_amount_rejected(self):
         result = validate_adjustment('alice', 'bob', None)
         self.assertFalse(result['valid'])
@@ -321,6 +319,46 @@ class TestValidateAdjustment(unittest.TestCase):
         result = validate_adjustment('alice', 'new_target', 5, history=history)
         self.assertTrue(result['valid'])
 
+    def test_recent_window_counted_after_older_entries(self):
+        """Only the in-window tail counts, with other givers interleaved."""
+        now = time.time()
+        history = [
+            _make_history_entry('alice', f'old_{i}', 5, ts=now - 90000)
+            for i in range(MAX_ADJUSTMENTS_PER_DAY)
+        ]
+        for i in range(MAX_ADJUSTMENTS_PER_DAY - 1):
+            history.append(_make_history_entry('carol', f'c_{i}', 5, ts=now - 60))
+            history.append(_make_history_entry('alice', f'a_{i}', 5, ts=now - 60))
+        result = validate_adjustment('alice', 'new_target', 5, history=history)
+        self.assertTrue(result['valid'])
+
+        history.append(_make_history_entry('alice', 'last', 5, ts=now - 30))
+        result = validate_adjustment('alice', 'new_target', 5, history=history)
+        self.assertFalse(result['valid'])
+
+    def test_out_of_order_old_entry_does_not_hide_recent_ones(self):
+        """A back-dated or untimestamped entry at the end must not end the scan."""
+        now = time.time()
+        history = [
+            _make_history_entry('alice', f'target_{i}', 5, ts=now - 60)
+            for i in range(MAX_ADJUSTMENTS_PER_DAY)
+        ]
+        history.append(_make_history_entry('alice', 'backdated', 5, ts=now - 200000))
+        result = validate_adjustment('alice', 'new_target', 5, history=history, now=now)
+        self.assertFalse(result['valid'])
+
+        history.append({'from_id': 'alice', 'target_id': 'no_ts', 'amount': 5})
+        result = validate_adjustment('alice', 'new_target', 5, history=history, now=now)
+        self.assertFalse(result['valid'])
+
+    def test_explicit_now_sets_rate_limit_window(self):
+        history = [
+            _make_history_entry('alice', f'target_{i}', 5, ts=1000.0)
+            for i in range(MAX_ADJUSTMENTS_PER_DAY)
+        ]
+        self.assertFalse(validate_adjustment('alice', 'x', 5, history, now=2000.0)['valid'])
+        self.assertTrue(validate_adjustment('alice', 'x', 5, history, now=1000.0 + 90000)['valid'])
+
     def test_zero_amount_valid(self):
         result = validate_adjustment('alice', 'bob', 0)
         self.assertTrue(result['valid'])
@@ -405,6 +443,10 @@ class TestApplyAdjustment(unittest.TestCase):
         )
         self.assertLessEqual(len(history), MAX_HISTORY_ENTRIES)
 
+    def test_explicit_now_recorded_on_entry(self):
+        _, history, _ = apply_adjustment({}, [], 'alice', 'bob', 5, 'x', now=1234.5)
+        self.assertEqual(history[0]['timestamp'], 1234.5)
+
     def test_accumulation_across_multiple_calls(self):
         scores = {}
         history = []
@@ -414,6 +456,70 @@ class TestApplyAdjustment(unittest.TestCase):
         self.assertEqual(len(history), 2)
 
 
+# ===========================================================================
+# apply_adjustments
+# ===========================================================================
+
+class TestApplyAdjustments(unittest.TestCase):
+    """Tests for batched adjustment application."""
+
+    def test_matches_chained_apply_adjustment(self):
+        batch = [('alice', 'bob', 30, 'a'), ('carol', 'bob', 20), ('bob', 'dave', -5, 'c')]
+        scores, history = {'bob': 10}, []
+        for item in batch:
+            scores, history, _ = apply_adjustment(scores, history, *item)
+        bulk_scores, bulk_history, results = apply_adjustments({'bob': 10}, [], batch)
+        self.assertEqual(bulk_scores, scores)
+        self.assertEqual(
+            [(e['from_id'], e['target_id'], e['amount'], e['reason']) for e in bulk_history],
+            [(e['from_id'], e['target_id'], e['amount'], e['reason']) for e in history],
+        )
+        self.assertTrue(all(r['success'] for r in results))
+
+    def test_invalid_items_rejected_without_stopping_batch(self):
+        scores, history, results = apply_adjustments(
+            {}, [], [('alice', 'alice', 5), ('alice', 'bob', 500), ('alice', 'bob', 5)]
+        )
+        self.assertEqual([r['success'] for r in results], [False, False, True])
+        self.assertEqual(scores, {'bob': 5})
+        self.assertEqual(len(history), 1)
+
+    def test_rate_limit_applies_within_batch(self):
+        batch = [('alice', f't{i}', 1) for i in range(MAX_ADJUSTMENTS_PER_DAY + 1)]
+        _, history, results = apply_adjustments({}, [], batch)
+        self.assertFalse(results[-1]['success'])
+        self.assertIn('Rate limit', results[-1]['error'])
+        self.assertEqual(len(history), MAX_ADJUSTMENTS_PER_DAY)
+
+    def test_oversized_history_validated_untrimmed(self):
+        """Entries beyond the cap still count, as with chained apply_adjustment."""
+        now = 1_000_000.0
+        history = [_make_history_entry('alice', f'old_{i}', 1, ts=now - 60)
+                   for i in range(MAX_ADJUSTMENTS_PER_DAY)]
+        history += [_make_history_entry('carol', f'c_{i}', 1, ts=now - 90000)
+                     for i in range(MAX_HISTORY_ENTRIES)]
+        batch = [('alice', 'bob', 5), ('carol', 'dave', 5), ('alice', 'erin', 5)]
+
+        scores, chained, chained_results = {}, history, []
+        for item in batch:
+            scores, chained, result = apply_adjustment(scores, chained, *item, now=now)
+            chained_results.append(result['success'])
+        bulk_scores, bulk_history, results = apply_adjustments({}, history, batch, now=now)
+
+        self.assertEqual([r['success'] for r in results], chained_results)
+        # alice is limited by entries past the cap until carol's append trims them
+        self.assertEqual(chained_results, [False, True, True])
+        self.assertEqual(bulk_scores, scores)
+        self.assertEqual(bulk_history, chained)
+        self.assertEqual(len(bulk_history), MAX_HISTORY_ENTRIES)
+
+    def test_inputs_not_mutated(self):
+        scores, history = {'bob': 1}, []
+        apply_adjustments(scores, history, [('alice', 'bob', 5)])
+        self.assertEqual(scores, {'bob': 1})
+        self.assertEqual(history, [])
+
+
 # ===========================================================================
 # get_top_citizens
 # ===========================================================================
@@ -498,6 +604,62 @@ class TestLoadSaveReputation(unittest.TestCase):
         finally:
             os.unlink(path)
 
+    def test_load_caps_oversized_history(self):
+        history = [_make_history_entry(ts=i) for i in range(MAX_HISTORY_ENTRIES + 5)]
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as fh:
+            json.dump({'scores': {}, 'history': history, 'lastDecayAt': 0}, fh)
+            path = fh.name
+        try:
+            loaded = load_reputation(path)
+            self.assertEqual(len(loaded['history']), MAX_HISTORY_ENTRIES)
+            self.assertEqual(loaded['history'][0]['timestamp'], 5)
+        finally:
+            os.unlink(path)
+
+    def test_load_interns_history_citizen_ids(self):
+        history = [_make_history_entry('alice', 'bob'), _make_history_entry('alice', 'bob')]
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as fh:
+            json.dump({'scores': {}, 'history': history, 'lastDecayAt': 0}, fh)
+            path = fh.name
+        try:
+            first, second = load_reputation(path)['history']
+            self.assertIs(first['from_id'], second['from_id'])
+            self.assertIs(first['target_id'], second['target_id'])
+        finally:
+            os.unlink(path)
+
+    def test_save_leaves_no_temp_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'reputation.json')
+            save_reputation(path, {'scores': {'a': 1}, 'history': [], 'lastDecayAt': 0})
+            self.assertEqual(os.listdir(tmp), ['reputation.json'])
+            self.assertEqual(load_reputation(path)['scores'], {'a': 1})
+
+    def test_failed_save_removes_temp_file_and_keeps_original(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'reputation.json')
+            save_reputation(path, {'scores': {'a': 1}, 'history': [], 'lastDecayAt': 0})
+            with mock.patch('reputation_engine.os.replace', side_effect=OSError('boom')):
+                with self.assertRaises(OSError):
+                    save_reputation(path, {'scores': {'a': 2}, 'history': [], 'lastDecayAt': 0})
+            self.assertEqual(os.listdir(tmp), ['reputation.json'])
+            self.assertEqual(load_reputation(path)['scores'], {'a': 1})
+
+    def test_save_accepts_deque_history(self):
+        data = {
+            'scores': {},
+            'history': deque([_make_history_entry()], maxlen=MAX_HISTORY_ENTRIES),
+            'lastDecayAt': 0,
+        }
+        with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as fh:
+            path = fh.name
+        try:
+            save_reputation(path, data)
+            self.assertIsInstance(data['history'], deque)
+            self.assertEqual(len(load_reputation(path)['history']), 1)
+        finally:
+            os.unlink(path)
+
     def test_load_file_missing_keys_adds_defaults(self):
         data = {'scores': {'bob': 50}}
         with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as fh:
@@ -1,27 +1,241 @@
 #!/usr/bin/env python3
-"""Tests for sim_forge.py — Simulation Forge meta-tool"""
+"""Tests for sim_forge.py — Simulation Forge meta-tool
+
+Scratch directories go under $FORGE_TEST_TMPDIR when set, else /dev/shm
+when it is writable, else the system temp dir.
+"""
 import sys
 import os
+import io
 import json
+import contextlib
+import re
 import unittest
 import importlib.util
+import shutil
 import tempfile
 import subprocess
+import select
+import time
+from unittest import mock
 
 # Make scripts/ importable
 SCRIPTS_DIR = os.path.join(os.path.dirname(__file__), '..', 'scripts')
-sys.path.insert(0, os.path.abspath(SCRIPTS_DIR))
+_ABS_SCRIPTS = os.path.abspath(SCRIPTS_DIR)
+if _ABS_SCRIPTS not in sys.path:
+    sys.path.insert(0, _ABS_SCRIPTS)
 
-# Load sim_forge as a module
+# Load sim_forge as a module, once per process
 def load_sim_forge():
+    if 'sim_forge' in sys.modules:
+        return sys.modules['sim_forge']
     forge_path = os.path.join(SCRIPTS_DIR, 'sim_forge.py')
     spec = importlib.util.spec_from_file_location('sim_forge', forge_path)
     mod = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(mod)
+    # Register before executing, as the import system does, so a later
+    # `import sim_forge` (or a self-reference) reuses this module object
+    sys.modules['sim_forge'] = mod
+    try:
+        spec.loader.exec_module(mod)
+    except BaseException:
+        del sys.modules['sim_forge']
+        raise
     return mod
 
 forge = load_sim_forge()
 
+# Every forge() call writes and removes a small file tree; keep that churn
+# in RAM where a tmpfs is available.
+_TMP_ROOT = os.environ.get('FORGE_TEST_TMPDIR') or (
+    '/dev/shm' if os.access('/dev/shm', os.W_OK) else None
+)
+
+# ---------------------------------------------------------------------------
+# Shared node process for syntax checks and snippet runs
+# ---------------------------------------------------------------------------
+
+# Resolved once so every spawn skips the PATH search; tests that need node
+# are skipped rather than failing when it is not installed.
+_NODE = shutil.which('node')
+requires_node = unittest.skipUnless(_NODE, 'node is not installed')
+
+# Line-delimited JSON bridge. A 'check' request carries a source string or
+# names a file and the reply says whether it compiles; sources are wrapped
+# like CommonJS modules (with a leading #! line commented out) so the check
+# matches what `node -c` accepts. A 'run_many' request runs a list of
+# snippets, each against a freshly loaded copy of a module bound as `Sim`,
+# capturing console output and process.exit() the way a separate `node`
+# run would report them. Replies go to a dedicated pipe (fd passed as the
+# first argument), so stray output from a snippet's timers or promises
+# cannot corrupt the protocol.
+_BRIDGE_JS = r"""
+var fs = require('fs'), vm = require('vm'), util = require('util');
+var Module = require('module');
+var replyFd = Number(process.argv[1]);
+
+function reply(obj) {
+  var buf = Buffer.from(JSON.stringify(obj) + '\n');
+  for (var off = 0; off < buf.length;) off += fs.writeSync(replyFd, buf, off);
+}
+
+function check(req) {
+  try {
+    var src = req.source !== undefined ? req.source : fs.readFileSync(req.path, 'utf8');
+    new vm.Script(Module.wrap(src.replace(/^#!/, '//')), { filename: req.path || '[source]' });
+    return { ok: true };
+  } catch (e) {
+    return { ok: false, err: String(e.stack || e) };
+  }
+}
+
+function ExitSignal(code) { this.code = code; }
+
+function run(modulePath, script) {
+  var out = [], err = [], code = 0;
+  var saved = { log: console.log, info: console.info, warn: console.warn,
+                error: console.error, exit: process.exit };
+  function capture(buf) {
+    return function () { buf.push(util.format.apply(null, arguments) + '\n'); };
+  }
+  console.log = console.info = capture(out);
+  console.warn = console.error = capture(err);
+  process.exit = function (c) { throw new ExitSignal(c === undefined ? 0 : c); };
+  try {
+    delete require.cache[require.resolve(modulePath)];
+    new Function('Sim', script)(require(modulePath));
+  } catch (e) {
+    if (e instanceof ExitSignal) {
+      code = e.code;
+    } else {
+      err.push(String(e.stack || e) + '\n');
+      code = 1;
+    }
+  } finally {
+    console.log = saved.log; console.info = saved.info;
+    console.warn = saved.warn; console.error = saved.error;
+    process.exit = saved.exit;
+  }
+  return { returncode: code, stdout: out.join(''), stderr: err.join('') };
+}
+
+require('readline').createInterface({ input: process.stdin }).on('line', function (line) {
+  var req = JSON.parse(line);
+  var res = req.cmd === 'run_many' ? req.scripts.map(function (script) {
+    return run(req.module, script);
+  }) : check(req);
+  reply(res);
+});
+"""
+
+
+class _NodeWorker:
+    """One long-lived node process that answers check and run requests.
+
+    Starting node costs tens of milliseconds, so the suite keeps a single
+    process around instead of spawning `node` once per check or snippet.
+    A crashed or hung bridge raises RuntimeError with node's stderr instead
+    of hanging the suite or failing later tests with JSON errors.
+    """
+
+    TIMEOUT = 60  # seconds per request
+
+    def __init__(self):
+        self._stderr = tempfile.TemporaryFile(mode='w+')
+        reply_r, reply_w = os.pipe()
+        try:
+            self._proc = subprocess.Popen(
+                [_NODE, '-e', _BRIDGE_JS, str(reply_w)],
+                stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                stderr=self._stderr, pass_fds=(reply_w,), text=True,
+            )
+        finally:
+            os.close(reply_w)
+        self._reply_fd = reply_r
+        self._buf = b''
+
+    def alive(self):
+        return self._proc.poll() is None
+
+    def _fail(self, what):
+        if self.alive():
+            self._proc.kill()
+        self._proc.wait()
+        self._stderr.seek(0)
+        raise RuntimeError('node bridge %s (returncode %s):\n%s'
+                           % (what, self._proc.returncode, self._stderr.read()))
+
+    def _read_reply(self):
+        deadline = time.monotonic() + self.TIMEOUT
+        while b'\n' not in self._buf:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([self._reply_fd], [], [], remaining)[0]:
+                self._fail('timed out after %ss' % self.TIMEOUT)
+            chunk = os.read(self._reply_fd, 65536)
+            if not chunk:
+                self._fail('exited')
+            self._buf += chunk
+        line, self._buf = self._buf.split(b'\n', 1)
+        return json.loads(line)
+
+    def request(self, **req):
+        try:
+            self._proc.stdin.write(json.dumps(req) + '\n')
+            self._proc.stdin.flush()
+        except (BrokenPipeError, OSError):
+            self._fail('closed its input')
+        return self._read_reply()
+
+    def run_many_with_sim(self, module_path, scripts):
+        """Run each script with a fresh `Sim = require(module_path)` in scope.
+
+        All scripts go over in one request; returns one CompletedProcess per
+        script so callers read results like subprocess.run().
+        """
+        return [
+            subprocess.CompletedProcess([_NODE], res['returncode'], res['stdout'], res['stderr'])
+            for res in self.request(cmd='run_many', module=module_path, scripts=scripts)
+        ]
+
+    def close(self):
+        try:
+            self._proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            self._proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self._proc.kill()
+            self._proc.wait()
+        os.close(self._reply_fd)
+        self._stderr.close()
+
+
+_node_worker = None
+
+
+def node_worker():
+    """Return the shared node worker, (re)starting it if it is not running."""
+    global _node_worker
+    if _node_worker is None or not _node_worker.alive():
+        _node_worker = _NodeWorker()
+    return _node_worker
+
+
+def _check_request(**req):
+    res = node_worker().request(cmd='check', **req)
+    return res['ok'], res.get('err', '')
+
+
+def node_syntax_check(js_source):
+    """Syntax-check a JS source string like `node -c`. Returns (ok, error_text)."""
+    return _check_request(source=js_source)
+
+
+def node_syntax_check_file(path):
+    """Syntax-check a JS file on disk like `node -c`. Returns (ok, error_text)."""
+    return _check_request(path=path)
+
+
 # ---------------------------------------------------------------------------
 # Spec fixtures
 # ---------------------------------------------------------------------------
@@ -49,11 +263,96 @@ INVALID_SPECS = [
     {},                                         # no name
     {"name": "x"},                             # no collections
     {"name": "x", "collections": {}},          # empty collections
-    {"name": "123bad"},                        # name starts with digit
+    {"name": "123bad", "collections": {"a": {"fields": []}}},  # name starts with digit
     {"name": "has space", "collections": {"a": {"fields": []}}},  # name has space
     {"name": "ok", "collections": "not-a-dict"},  # collections wrong type
 ]
 
+# The fixtures are frozen and the generators are pure, so parse and
+# generate each (spec, generator) pair once for every class that reads it.
+_TODO_SPEC = forge.parse_spec(MINIMAL_SPEC)
+_PM_SPEC = forge.parse_spec(PM_SPEC)
+_TODO_JS = forge.generate_module(_TODO_SPEC)
+_PM_JS = forge.generate_module(_PM_SPEC)
+_TODO_STATE = forge.generate_state(_TODO_SPEC)
+_PM_STATE = forge.generate_state(_PM_SPEC)
+_TODO_TESTS = forge.generate_tests(_TODO_SPEC)
+_PM_TESTS = forge.generate_tests(_PM_SPEC)
+
+# Serialized spec payloads for the CLI tests: text for the in-process
+# stdin, bytes for spec files and the real subprocess run.
+_MINIMAL_JSON = json.dumps(MINIMAL_SPEC)
+_MINIMAL_JSON_BYTES = _MINIMAL_JSON.encode('utf-8')
+_PM_JSON_BYTES = json.dumps(PM_SPEC).encode('utf-8')
+
+
+# A declaration at the start of a line; comment lines (// or *) can never
+# match, so no separate comment filtering is needed.
+_CONST_LET_RE = re.compile(r'^[ \t]*(?:const|let) ', re.MULTILINE)
+
+
+def missing_tokens(text, tokens):
+    """Return the tokens that do not occur in text, in the given order.
+
+    Lets one assertion cover a whole group of expected snippets and report
+    every missing one in a single diff.
+    """
+    return [tok for tok in tokens if tok not in text]
+
+
+_OUTPUT_SUBDIRS = (('src', 'js'), ('state', 'simulations'), ('tests',))
+
+
+def _ensure_dirs(root):
+    """Create the forge output layout under root."""
+    for sub in _OUTPUT_SUBDIRS:
+        os.makedirs(os.path.join(root, *sub), exist_ok=True)
+
+
+_artifact_dir = None
+_artifact_paths = None
+
+
+def forged_artifacts():
+    """Forge both fixture specs once and return (todo_paths, pm_paths).
+
+    The classes that run or inspect forged files only read them, so they
+    share one output tree instead of each forging its own copy.
+    """
+    global _artifact_dir, _artifact_paths
+    if _artifact_paths is None:
+        _artifact_dir = tempfile.mkdtemp(prefix='forge_shared_', dir=_TMP_ROOT)
+        _ensure_dirs(_artifact_dir)
+        _artifact_paths = (
+            forge.forge(_TODO_SPEC, _artifact_dir),
+            forge.forge(_PM_SPEC, _artifact_dir),
+        )
+    return _artifact_paths
+
+
+def classify_paths(paths):
+    """Index forge() output paths by artifact kind: module, state, tests."""
+    kinds = {}
+    for p in paths:
+        base = os.path.basename(p)
+        if base.endswith('.json'):
+            kinds['state'] = p
+        elif base.startswith('test_sim_'):
+            kinds['tests'] = p
+        elif base.startswith('sim_') and base.endswith('.js'):
+            kinds['module'] = p
+    return kinds
+
+
+def tearDownModule():
+    global _node_worker, _artifact_dir, _artifact_paths
+    if _node_worker is not None:
+        _node_worker.close()
+        _node_worker = None
+    if _artifact_dir is not None:
+        shutil.rmtree(_artifact_dir)
+        _artifact_dir = _artifact_paths = None
+
 
 # ---------------------------------------------------------------------------
 # parse_spec tests
@@ -88,29 +387,11 @@ class TestParseSpec(unittest.TestCase):
         spec = forge.parse_spec(PM_SPEC)
         self.assertEqual(spec.get('description'), PM_SPEC['description'])
 
-    def test_parse_invalid_no_name(self):
-        with self.assertRaises(ValueError):
-            forge.parse_spec({})
-
-    def test_parse_invalid_no_collections(self):
-        with self.assertRaises(ValueError):
-            forge.parse_spec({"name": "x"})
-
-    def test_parse_invalid_empty_collections(self):
-        with self.assertRaises(ValueError):
-            forge.parse_spec({"name": "x", "collections": {}})
-
-    def test_parse_invalid_name_starts_with_digit(self):
-        with self.assertRaises(ValueError):
-            forge.parse_spec({"name": "123bad", "collections": {"a": {"fields": []}}})
-
-    def test_parse_invalid_name_has_space(self):
-        with self.assertRaises(ValueError):
-            forge.parse_spec({"name": "has space", "collections": {"a": {"fields": []}}})
-
-    def test_parse_invalid_collections_not_dict(self):
-        with self.assertRaises(ValueError):
-            forge.parse_spec({"name": "ok", "collections": "not-a-dict"})
+    def test_parse_invalid_specs(self):
+        for bad in INVALID_SPECS:
+            with self.subTest(spec=bad):
+                with self.assertRaises(ValueError):
+                    forge.parse_spec(bad)
 
     def test_parse_fields_default_to_list(self):
         spec = forge.parse_spec({
@@ -130,11 +411,10 @@ class TestParseSpec(unittest.TestCase):
 
 class TestGenerateModule(unittest.TestCase):
 
-    def setUp(self):
-        self.todo_spec = forge.parse_spec(MINIMAL_SPEC)
-        self.pm_spec = forge.parse_spec(PM_SPEC)
-        self.todo_js = forge.generate_module(self.todo_spec)
-        self.pm_js = forge.generate_module(self.pm_spec)
+    todo_spec = _TODO_SPEC
+    pm_spec = _PM_SPEC
+    todo_js = _TODO_JS
+    pm_js = _PM_JS
 
     def test_returns_string(self):
         self.assertIsInstance(self.todo_js, str)
@@ -149,84 +429,50 @@ class TestGenerateModule(unittest.TestCase):
         self.assertIn('window.Sim', self.todo_js)
         self.assertIn('window.Sim', self.pm_js)
 
-    def test_exports_initState(self):
-        self.assertIn('exports.initState', self.todo_js)
-
-    def test_exports_applyAction(self):
-        self.assertIn('exports.applyAction', self.todo_js)
-
-    def test_exports_getState(self):
-        self.assertIn('exports.getState', self.todo_js)
-
-    def test_exports_getSchema(self):
-        self.assertIn('exports.getSchema', self.todo_js)
+    def test_exports_api(self):
+        self.assertEqual(missing_tokens(self.todo_js, (
+            'exports.initState', 'exports.applyAction',
+            'exports.getState', 'exports.getSchema',
+        )), [])
 
     def test_schema_contains_collection_names(self):
-        self.assertIn('items', self.todo_js)
-        self.assertIn('boards', self.pm_js)
-        self.assertIn('tasks', self.pm_js)
-        self.assertIn('sprints', self.pm_js)
+        self.assertEqual(missing_tokens(self.todo_js, ('items',)), [])
+        self.assertEqual(missing_tokens(self.pm_js, ('boards', 'tasks', 'sprints')), [])
 
     def test_schema_contains_fields(self):
-        self.assertIn('title', self.todo_js)
-        self.assertIn('done', self.todo_js)
+        self.assertEqual(missing_tokens(self.todo_js, ('title', 'done')), [])
         self.assertIn('assignee', self.pm_js)
 
     def test_initState_handles_snapshot(self):
         self.assertIn('snapshot', self.todo_js)
 
-    def test_applyAction_handles_create(self):
-        # Should have create action handling
-        self.assertIn('create', self.todo_js)
-
-    def test_applyAction_handles_update(self):
-        self.assertIn('update', self.todo_js)
-
-    def test_applyAction_handles_delete(self):
-        self.assertIn('delete', self.todo_js)
+    def test_applyAction_handles_crud(self):
+        self.assertEqual(missing_tokens(self.todo_js, ('create', 'update', 'delete')), [])
 
+    @requires_node
     def test_node_syntax_check_todo(self):
         """Generated JS must pass node -c syntax check"""
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.js', delete=False) as f:
-            f.write(self.todo_js)
-            fname = f.name
-        try:
-            result = subprocess.run(['node', '-c', fname], capture_output=True, text=True)
-            self.assertEqual(result.returncode, 0,
-                             f'node -c failed:\n{result.stderr}')
-        finally:
-            os.unlink(fname)
+        ok, err = node_syntax_check(self.todo_js)
+        self.assertTrue(ok, f'node -c failed:\n{err}')
 
+    @requires_node
     def test_node_syntax_check_pm(self):
         """Generated PM module must pass node -c syntax check"""
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.js', delete=False) as f:
-            f.write(self.pm_js)
-            fname = f.name
-        try:
-            result = subprocess.run(['node', '-c', fname], capture_output=True, text=True)
-            self.assertEqual(result.returncode, 0,
-                             f'node -c failed:\n{result.stderr}')
-        finally:
-            os.unlink(fname)
+        ok, err = node_syntax_check(self.pm_js)
+        self.assertTrue(ok, f'node -c failed:\n{err}')
 
     def test_var_not_const_let(self):
         """Generated JS uses var for ES5 compatibility (not const/let at module level)"""
-        lines = self.todo_js.split('\n')
-        for line in lines:
-            stripped = line.strip()
-            # Skip comments
-            if stripped.startswith('//') or stripped.startswith('*'):
-                continue
-            # const/let at the top of lines are a red flag
-            if stripped.startswith('const ') or stripped.startswith('let '):
-                self.fail(f'Found const/let in generated module: {line}')
+        match = _CONST_LET_RE.search(self.todo_js)
+        if match:
+            line = self.todo_js[match.start():].split('\n', 1)[0]
+            self.fail(f'Found const/let in generated module: {line}')
 
     def test_deep_clone_in_getState(self):
         self.assertIn('JSON.parse(JSON.stringify', self.todo_js)
 
     def test_multiple_collections_all_present(self):
-        for coll_name in ['boards', 'tasks', 'sprints']:
-            self.assertIn(coll_name, self.pm_js)
+        self.assertEqual(missing_tokens(self.pm_js, ('boards', 'tasks', 'sprints')), [])
 
 
 # ---------------------------------------------------------------------------
@@ -235,54 +481,59 @@ class TestGenerateModule(unittest.TestCase):
 
 class TestGenerateState(unittest.TestCase):
 
-    def setUp(self):
-        self.todo_spec = forge.parse_spec(MINIMAL_SPEC)
-        self.pm_spec = forge.parse_spec(PM_SPEC)
-        self.todo_state_str = forge.generate_state(self.todo_spec)
-        self.pm_state_str = forge.generate_state(self.pm_spec)
+    todo_spec = _TODO_SPEC
+    pm_spec = _PM_SPEC
+    todo_state_str = _TODO_STATE
+    pm_state_str = _PM_STATE
+
+    @classmethod
+    def setUpClass(cls):
+        # Parse once; the tests only read the resulting dicts
+        cls.todo_state = json.loads(cls.todo_state_str)
+        cls.pm_state = json.loads(cls.pm_state_str)
 
     def test_returns_string(self):
         self.assertIsInstance(self.todo_state_str, str)
 
     def test_valid_json(self):
-        parsed = json.loads(self.todo_state_str)
+        parsed = self.todo_state
         self.assertIsInstance(parsed, dict)
 
     def test_has_schema(self):
-        parsed = json.loads(self.todo_state_str)
+        parsed = self.todo_state
         self.assertIn('_schema', parsed)
 
     def test_schema_has_collections(self):
-        parsed = json.loads(self.todo_state_str)
+        parsed = self.todo_state
         self.assertIn('collections', parsed['_schema'])
 
     def test_schema_collections_match_spec(self):
-        parsed = json.loads(self.todo_state_str)
+        parsed = self.todo_state
         self.assertIn('items', parsed['_schema']['collections'])
 
     def test_schema_fields_preserved(self):
-        parsed = json.loads(self.todo_state_str)
+        parsed = self.todo_state
         fields = parsed['_schema']['collections']['items']['fields']
         self.assertIn('title', fields)
         self.assertIn('done', fields)
 
     def test_collections_initialized_as_objects(self):
-        parsed = json.loads(self.todo_state_str)
+        parsed = self.todo_state
         self.assertIn('items', parsed)
         self.assertIsInstance(parsed['items'], dict)
 
     def test_pm_state_all_collections(self):
-        parsed = json.loads(self.pm_state_str)
+        parsed = self.pm_state
         for coll in ['boards', 'tasks', 'sprints']:
             self.assertIn(coll, parsed)
             self.assertIsInstance(parsed[coll], dict)
 
     def test_has_created_at(self):
-        parsed = json.loads(self.todo_state_str)
+        parsed = self.todo_state
         self.assertIn('_created_at', parsed)
 
     def test_has_sim_name(self):
-        parsed = json.loads(self.todo_state_str)
+        parsed = self.todo_state
         self.assertIn('_sim', parsed)
         self.assertEqual(parsed['_sim'], 'todo')
 
@@ -293,11 +544,10 @@ class TestGenerateState(unittest.TestCase):
 
 class TestGenerateTests(unittest.TestCase):
 
-    def setUp(self):
-        self.todo_spec = forge.parse_spec(MINIMAL_SPEC)
-        self.pm_spec = forge.parse_spec(PM_SPEC)
-        self.todo_tests = forge.generate_tests(self.todo_spec)
-        self.pm_tests = forge.generate_tests(self.pm_spec)
+    todo_spec = _TODO_SPEC
+    pm_spec = _PM_SPEC
+    todo_tests = _TODO_TESTS
+    pm_tests = _PM_TESTS
 
     def test_returns_string(self):
         self.assertIsInstance(self.todo_tests, str)
@@ -311,14 +561,8 @@ class TestGenerateTests(unittest.TestCase):
     def test_has_initState_test(self):
         self.assertIn('initState', self.todo_tests)
 
-    def test_has_create_test(self):
-        self.assertIn('create', self.todo_tests)
-
-    def test_has_update_test(self):
-        self.assertIn('update', self.todo_tests)
-
-    def test_has_delete_test(self):
-        self.assertIn('delete', self.todo_tests)
+    def test_has_crud_tests(self):
+        self.assertEqual(missing_tokens(self.todo_tests, ('create', 'update', 'delete')), [])
 
     def test_has_schema_validation(self):
         self.assertIn('_schema', self.todo_tests)
@@ -327,8 +571,7 @@ class TestGenerateTests(unittest.TestCase):
         self.assertIn('function assert(', self.todo_tests)
 
     def test_tests_for_all_collections(self):
-        for coll in ['boards', 'tasks', 'sprints']:
-            self.assertIn(coll, self.pm_tests)
+        self.assertEqual(missing_tokens(self.pm_tests, ('boards', 'tasks', 'sprints')), [])
 
     def test_has_edge_case_missing_fields(self):
         # Test for missing required fields / edge cases
@@ -346,17 +589,11 @@ class TestGenerateTests(unittest.TestCase):
     def test_has_exit_code(self):
         self.assertIn('process.exit', self.todo_tests)
 
+    @requires_node
     def test_node_syntax_check(self):
         """Generated test JS must pass node -c syntax check"""
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.js', delete=False) as f:
-            f.write(self.todo_tests)
-            fname = f.name
-        try:
-            result = subprocess.run(['node', '-c', fname], capture_output=True, text=True)
-            self.assertEqual(result.returncode, 0,
-                             f'node -c failed on generated tests:\n{result.stderr}')
-        finally:
-            os.unlink(fname)
+        ok, err = node_syntax_check(self.todo_tests)
+        self.assertTrue(ok, f'node -c failed on generated tests:\n{err}')
 
     def test_pm_tests_require_correct_module(self):
         self.assertIn('sim_project_manager', self.pm_tests)
@@ -368,76 +605,55 @@ class TestGenerateTests(unittest.TestCase):
 
 class TestForge(unittest.TestCase):
 
-    def setUp(self):
-        self.tmp_dir = tempfile.mkdtemp()
-        # Create required subdirs that forge expects
-        os.makedirs(os.path.join(self.tmp_dir, 'src', 'js'), exist_ok=True)
-        os.makedirs(os.path.join(self.tmp_dir, 'state', 'simulations'), exist_ok=True)
-        os.makedirs(os.path.join(self.tmp_dir, 'tests'), exist_ok=True)
-
-    def tearDown(self):
-        import shutil
-        shutil.rmtree(self.tmp_dir)
+    @classmethod
+    def setUpClass(cls):
+        # The tests only inspect the written files
+        cls.todo_paths, cls.pm_paths = forged_artifacts()
+        cls.todo = classify_paths(cls.todo_paths)
+        cls.pm = classify_paths(cls.pm_paths)
 
     def test_forge_creates_three_files(self):
-        spec = forge.parse_spec(MINIMAL_SPEC)
-        paths = forge.forge(spec, self.tmp_dir)
-        self.assertEqual(len(paths), 3)
+        self.assertEqual(len(self.todo_paths), 3)
 
     def test_forge_js_module_path(self):
-        spec = forge.parse_spec(MINIMAL_SPEC)
-        paths = forge.forge(spec, self.tmp_dir)
-        js_path = next(p for p in paths if p.endswith('.js') and 'sim_' in os.path.basename(p) and 'test' not in os.path.basename(p))
+        js_path = self.todo['module']
         self.assertTrue(os.path.exists(js_path))
         self.assertIn('sim_todo', js_path)
 
     def test_forge_state_json_path(self):
-        spec = forge.parse_spec(MINIMAL_SPEC)
-        paths = forge.forge(spec, self.tmp_dir)
-        state_path = next(p for p in paths if p.endswith('.json'))
+        state_path = self.todo['state']
         self.assertTrue(os.path.exists(state_path))
         self.assertIn('todo', state_path)
 
     def test_forge_test_js_path(self):
-        spec = forge.parse_spec(MINIMAL_SPEC)
-        paths = forge.forge(spec, self.tmp_dir)
-        test_path = next(p for p in paths if 'test_sim_' in os.path.basename(p))
+        test_path = self.todo['tests']
         self.assertTrue(os.path.exists(test_path))
 
+    @requires_node
     def test_forge_js_passes_syntax(self):
-        spec = forge.parse_spec(MINIMAL_SPEC)
-        paths = forge.forge(spec, self.tmp_dir)
-        js_path = next(p for p in paths if p.endswith('.js') and 'sim_' in os.path.basename(p) and 'test' not in os.path.basename(p))
-        result = subprocess.run(['node', '-c', js_path], capture_output=True, text=True)
-        self.assertEqual(result.returncode, 0, f'node -c failed:\n{result.stderr}')
+        ok, err = node_syntax_check_file(self.todo['module'])
+        self.assertTrue(ok, f'node -c failed:\n{err}')
 
+    @requires_node
     def test_forge_test_js_passes_syntax(self):
-        spec = forge.parse_spec(MINIMAL_SPEC)
-        paths = forge.forge(spec, self.tmp_dir)
-        test_path = next(p for p in paths if 'test_sim_' in os.path.basename(p))
-        result = subprocess.run(['node', '-c', test_path], capture_output=True, text=True)
-        self.assertEqual(result.returncode, 0, f'node -c failed:\n{result.stderr}')
+        ok, err = node_syntax_check_file(self.todo['tests'])
+        self.assertTrue(ok, f'node -c failed:\n{err}')
 
     def test_forge_state_json_valid(self):
-        spec = forge.parse_spec(MINIMAL_SPEC)
-        paths = forge.forge(spec, self.tmp_dir)
-        state_path = next(p for p in paths if p.endswith('.json'))
-        with open(state_path) as f:
+        with open(self.todo['state']) as f:
             data = json.load(f)
         self.assertIn('_schema', data)
         self.assertIn('items', data)
 
     def test_forge_pm_spec(self):
-        spec = forge.parse_spec(PM_SPEC)
-        paths = forge.forge(spec, self.tmp_dir)
-        self.assertEqual(len(paths), 3)
-        js_path = next(p for p in paths if 'sim_project_manager' in p and 'test' not in os.path.basename(p))
+        self.assertEqual(len(self.pm_paths), 3)
+        self.assertEqual(set(self.pm), {'module', 'state', 'tests'})
+        js_path = self.pm['module']
+        self.assertIn('sim_project_manager', js_path)
         self.assertTrue(os.path.exists(js_path))
 
     def test_forge_returns_absolute_paths(self):
-        spec = forge.parse_spec(MINIMAL_SPEC)
-        paths = forge.forge(spec, self.tmp_dir)
-        for p in paths:
+        for p in self.todo_paths + self.pm_paths:
             self.assertTrue(os.path.isabs(p), f'Path not absolute: {p}')
 
 
@@ -445,57 +661,26 @@ class TestForge(unittest.TestCase):
 # Generated module functional tests (run the generated JS with node)
 # ---------------------------------------------------------------------------
 
+@requires_node
 class TestGeneratedModuleFunctional(unittest.TestCase):
     """Run the generated JS module against test scenarios using node."""
 
-    def setUp(self):
-        self.tmp_dir = tempfile.mkdtemp()
-        os.makedirs(os.path.join(self.tmp_dir, 'src', 'js'), exist_ok=True)
-        os.makedirs(os.path.join(self.tmp_dir, 'state', 'simulations'), exist_ok=True)
-        os.makedirs(os.path.join(self.tmp_dir, 'tests'), exist_ok=True)
-        spec = forge.parse_spec(MINIMAL_SPEC)
-        paths = forge.forge(spec, self.tmp_dir)
-        self.js_path = next(p for p in paths if p.endswith('.js') and 'sim_todo' in p and 'test' not in os.path.basename(p))
-
-    def tearDown(self):
-        import shutil
-        shutil.rmtree(self.tmp_dir)
-
-    def _run_js(self, script):
-        """Run a JS snippet that requires the generated module."""
-        full_script = f"var Sim = require({json.dumps(self.js_path)});\n" + script
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.js', delete=False) as f:
-            f.write(full_script)
-            fname = f.name
-        try:
-            result = subprocess.run(['node', fname], capture_output=True, text=True)
-            return result
-        finally:
-            os.unlink(fname)
-
-    def test_initState_empty(self):
-        r = self._run_js("""
+    # Scenario name -> snippet run with the generated module as `Sim`
+    SCENARIOS = {
+        'initState_empty': """
 var s = Sim.initState();
 if (!s || typeof s !== 'object') { process.exit(1); }
 if (!s.items || typeof s.items !== 'object') { process.exit(1); }
 console.log('ok');
-""")
-        self.assertEqual(r.returncode, 0, r.stderr)
-        self.assertIn('ok', r.stdout)
-
-    def test_initState_from_snapshot(self):
-        r = self._run_js("""
+""",
+        'initState_from_snapshot': """
 var snap = { items: { 'itm_1': { id: 'itm_1', title: 'Hello' } }, _schema: { collections: { items: { fields: ['title','done'] } } } };
 var s = Sim.initState(snap);
 if (!s.items['itm_1']) { console.error('no item'); process.exit(1); }
 if (s.items['itm_1'].title !== 'Hello') { console.error('wrong title'); process.exit(1); }
 console.log('ok');
-""")
-        self.assertEqual(r.returncode, 0, r.stderr)
-        self.assertIn('ok', r.stdout)
-
-    def test_applyAction_create(self):
-        r = self._run_js("""
+""",
+        'applyAction_create': """
 var s = Sim.initState();
 var msg = { from: 'user1', payload: { action: 'create_items', data: { title: 'Buy milk', done: false } } };
 var s2 = Sim.applyAction(s, msg);
@@ -503,12 +688,8 @@ var keys = Object.keys(s2.items);
 if (keys.length !== 1) { console.error('expected 1 item, got ' + keys.length); process.exit(1); }
 if (s2.items[keys[0]].title !== 'Buy milk') { console.error('wrong title'); process.exit(1); }
 console.log('ok');
-""")
-        self.assertEqual(r.returncode, 0, r.stderr)
-        self.assertIn('ok', r.stdout)
-
-    def test_applyAction_update(self):
-        r = self._run_js("""
+""",
+        'applyAction_update': """
 var s = Sim.initState();
 var msg1 = { from: 'user1', payload: { action: 'create_items', data: { title: 'Task A' } } };
 s = Sim.applyAction(s, msg1);
@@ -517,12 +698,8 @@ var msg2 = { from: 'user1', payload: { action: 'update_items', data: { id: id, t
 s = Sim.applyAction(s, msg2);
 if (s.items[id].title !== 'Task A Updated') { console.error('not updated'); process.exit(1); }
 console.log('ok');
-""")
-        self.assertEqual(r.returncode, 0, r.stderr)
-        self.assertIn('ok', r.stdout)
-
-    def test_applyAction_delete(self):
-        r = self._run_js("""
+""",
+        'applyAction_delete': """
 var s = Sim.initState();
 var msg1 = { from: 'u', payload: { action: 'create_items', data: { title: 'Del me' } } };
 s = Sim.applyAction(s, msg1);
@@ -531,44 +708,28 @@ var msg2 = { from: 'u', payload: { action: 'delete_items', data: { id: id } } };
 s = Sim.applyAction(s, msg2);
 if (Object.keys(s.items).length !== 0) { console.error('not deleted'); process.exit(1); }
 console.log('ok');
-""")
-        self.assertEqual(r.returncode, 0, r.stderr)
-        self.assertIn('ok', r.stdout)
-
-    def test_getState_returns_clone(self):
-        r = self._run_js("""
+""",
+        'getState_returns_clone': """
 var s = Sim.initState();
 var got = Sim.getState();
 if (!got || typeof got !== 'object') { console.error('bad getState'); process.exit(1); }
 console.log('ok');
-""")
-        self.assertEqual(r.returncode, 0, r.stderr)
-        self.assertIn('ok', r.stdout)
-
-    def test_getSchema_returns_schema(self):
-        r = self._run_js("""
+""",
+        'getSchema_returns_schema': """
 var s = Sim.initState();
 var schema = Sim.getSchema();
 if (!schema || !schema.collections || !schema.collections.items) { console.error('bad schema'); process.exit(1); }
 console.log('ok');
-""")
-        self.assertEqual(r.returncode, 0, r.stderr)
-        self.assertIn('ok', r.stdout)
-
-    def test_pure_function_original_unchanged(self):
-        r = self._run_js("""
+""",
+        'pure_function_original_unchanged': """
 var s = Sim.initState();
 var original_keys = Object.keys(s.items).length;
 var msg = { from: 'u', payload: { action: 'create_items', data: { title: 'X' } } };
 Sim.applyAction(s, msg);
 if (Object.keys(s.items).length !== original_keys) { console.error('original mutated!'); process.exit(1); }
 console.log('ok');
-""")
-        self.assertEqual(r.returncode, 0, r.stderr)
-        self.assertIn('ok', r.stdout)
-
-    def test_snapshot_roundtrip(self):
-        r = self._run_js("""
+""",
+        'snapshot_roundtrip': """
 var s = Sim.initState();
 var msg = { from: 'u', payload: { action: 'create_items', data: { title: 'Persist me', done: false } } };
 s = Sim.applyAction(s, msg);
@@ -578,41 +739,73 @@ var keys = Object.keys(restored.items);
 if (keys.length !== 1) { console.error('wrong item count after restore'); process.exit(1); }
 if (restored.items[keys[0]].title !== 'Persist me') { console.error('wrong title after restore'); process.exit(1); }
 console.log('ok');
-""")
+""",
+    }
+
+    @classmethod
+    def setUpClass(cls):
+        # Every scenario only requires the module, so run them all in a
+        # single round trip to the shared node process
+        cls.js_path = classify_paths(forged_artifacts()[0])['module']
+        results = node_worker().run_many_with_sim(cls.js_path, list(cls.SCENARIOS.values()))
+        cls.results = dict(zip(cls.SCENARIOS, results))
+
+    def _assert_scenario(self, name):
+        r = self.results[name]
         self.assertEqual(r.returncode, 0, r.stderr)
         self.assertIn('ok', r.stdout)
 
+    def test_initState_empty(self):
+        self._assert_scenario('initState_empty')
+
+    def test_initState_from_snapshot(self):
+        self._assert_scenario('initState_from_snapshot')
+
+    def test_applyAction_create(self):
+        self._assert_scenario('applyAction_create')
+
+    def test_applyAction_update(self):
+        self._assert_scenario('applyAction_update')
+
+    def test_applyAction_delete(self):
+        self._assert_scenario('applyAction_delete')
+
+    def test_getState_returns_clone(self):
+        self._assert_scenario('getState_returns_clone')
+
+    def test_getSchema_returns_schema(self):
+        self._assert_scenario('getSchema_returns_schema')
+
+    def test_pure_function_original_unchanged(self):
+        self._assert_scenario('pure_function_original_unchanged')
+
+    def test_snapshot_roundtrip(self):
+        self._assert_scenario('snapshot_roundtrip')
+
 
 # ---------------------------------------------------------------------------
 # Generated test file execution
 # ---------------------------------------------------------------------------
 
+@requires_node
 class TestGeneratedTestsRun(unittest.TestCase):
     """The auto-generated test file should itself pass when run with node."""
 
-    def setUp(self):
-        self.tmp_dir = tempfile.mkdtemp()
-        os.makedirs(os.path.join(self.tmp_dir, 'src', 'js'), exist_ok=True)
-        os.makedirs(os.path.join(self.tmp_dir, 'state', 'simulations'), exist_ok=True)
-        os.makedirs(os.path.join(self.tmp_dir, 'tests'), exist_ok=True)
-
-    def tearDown(self):
-        import shutil
-        shutil.rmtree(self.tmp_dir)
+    @classmethod
+    def setUpClass(cls):
+        todo_paths, pm_paths = forged_artifacts()
+        cls.todo_tests_path = classify_paths(todo_paths)['tests']
+        cls.pm_tests_path = classify_paths(pm_paths)['tests']
 
     def test_generated_todo_tests_pass(self):
-        spec = forge.parse_spec(MINIMAL_SPEC)
-        paths = forge.forge(spec, self.tmp_dir)
-        test_path = next(p for p in paths if 'test_sim_todo' in p)
-        result = subprocess.run(['node', test_path], capture_output=True, text=True)
+        test_path = self.todo_tests_path
+        result = subprocess.run([_NODE, test_path], capture_output=True, text=True)
         self.assertEqual(result.returncode, 0,
                          f'Generated tests failed:\nstdout: {result.stdout}\nstderr: {result.stderr}')
 
     def test_generated_pm_tests_pass(self):
-        spec = forge.parse_spec(PM_SPEC)
-        paths = forge.forge(spec, self.tmp_dir)
-        test_path = next(p for p in paths if 'test_sim_project_manager' in p)
-        result = subprocess.run(['node', test_path], capture_output=True, text=True)
+        test_path = self.pm_tests_path
+        result = subprocess.run([_NODE, test_path], capture_output=True, text=True)
         self.assertEqual(result.returncode, 0,
                          f'Generated PM tests failed:\nstdout: {result.stdout}\nstderr: {result.stderr}')
 
@@ -621,41 +814,93 @@ class TestGeneratedTestsRun(unittest.TestCase):
 # CLI tests
 # ---------------------------------------------------------------------------
 
+@requires_node
+class TestNodeWorker(unittest.TestCase):
+    """The node bridge fails loudly instead of hanging or desyncing."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.js_path = classify_paths(forged_artifacts()[0])['module']
+
+    def setUp(self):
+        # A private worker, so killing it cannot affect the shared one
+        self.worker = _NodeWorker()
+        self.addCleanup(self.worker.close)
+
+    def test_async_output_does_not_corrupt_replies(self):
+        first, = self.worker.run_many_with_sim(
+            self.js_path, ["setTimeout(function () { console.log('late'); }, 0);"])
+        self.assertEqual(first.returncode, 0)
+        res = self.worker.request(cmd='check', source='var x = 1;')
+        self.assertTrue(res['ok'], res.get('err'))
+
+    def test_dead_bridge_raises_with_returncode(self):
+        self.worker._proc.kill()
+        self.worker._proc.wait()
+        with self.assertRaisesRegex(RuntimeError, 'returncode'):
+            self.worker.request(cmd='check', source='var x = 1;')
+
+    def test_hung_bridge_times_out(self):
+        self.worker.TIMEOUT = 0.5
+        with self.assertRaisesRegex(RuntimeError, 'timed out'):
+            self.worker.run_many_with_sim(self.js_path, ['for (;;) {}'])
+        self.assertFalse(self.worker.alive())
+
+
 class TestCLI(unittest.TestCase):
 
     def setUp(self):
-        self.tmp_dir = tempfile.mkdtemp()
-        os.makedirs(os.path.join(self.tmp_dir, 'src', 'js'), exist_ok=True)
-        os.makedirs(os.path.join(self.tmp_dir, 'state', 'simulations'), exist_ok=True)
-        os.makedirs(os.path.join(self.tmp_dir, 'tests'), exist_ok=True)
+        self._td = tempfile.TemporaryDirectory(prefix='forge_', dir=_TMP_ROOT,
+                                               ignore_cleanup_errors=True)
+        self.tmp_dir = self._td.name
+        _ensure_dirs(self.tmp_dir)
         self.forge_script = os.path.join(SCRIPTS_DIR, 'sim_forge.py')
 
     def tearDown(self):
-        import shutil
-        shutil.rmtree(self.tmp_dir)
-
-    def _run_cli(self, args, stdin=None):
+        self._td.cleanup()
+
+    def _run_cli(self, args, stdin=None, _main=forge.main):
+        """Run sim_forge.main() in-process; returns a CompletedProcess."""
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with mock.patch('sys.stdin', io.StringIO(stdin or '')), \
+                contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                code = _main(args) or 0
+            except SystemExit as e:
+                code = e.code or 0
+        return subprocess.CompletedProcess(args, code, stdout.getvalue(), stderr.getvalue())
+
+    def _run_cli_subprocess(self, args, stdin=None):
+        """Run the script in a real interpreter; stdin and output are bytes."""
         cmd = ['python3', self.forge_script] + args
-        return subprocess.run(cmd, capture_output=True, text=True, input=stdin)
+        return subprocess.run(cmd, capture_output=True, input=stdin)
+
+    def test_cli_script_end_to_end(self):
+        """One real interpreter run keeps the __main__ entry path covered."""
+        spec_path = os.path.join(self.tmp_dir, 'todo_spec.json')
+        with open(spec_path, 'wb') as f:
+            f.write(_MINIMAL_JSON_BYTES)
+        r = self._run_cli_subprocess([spec_path, '--output-dir', self.tmp_dir])
+        self.assertEqual(r.returncode, 0, f'CLI failed:\n{r.stdout!r}\n{r.stderr!r}')
+        self.assertIn(b'sim_todo', r.stdout)
 
     def test_cli_from_spec_file(self):
         spec_path = os.path.join(self.tmp_dir, 'todo_spec.json')
-        with open(spec_path, 'w') as f:
-            json.dump(MINIMAL_SPEC, f)
+        with open(spec_path, 'wb') as f:
+            f.write(_MINIMAL_JSON_BYTES)
         r = self._run_cli([spec_path, '--output-dir', self.tmp_dir])
         self.assertEqual(r.returncode, 0, f'CLI failed:\n{r.stdout}\n{r.stderr}')
         self.assertTrue(os.path.exists(os.path.join(self.tmp_dir, 'src', 'js', 'sim_todo.js')))
 
     def test_cli_from_stdin(self):
-        spec_json = json.dumps(MINIMAL_SPEC)
-        r = self._run_cli(['--output-dir', self.tmp_dir], stdin=spec_json)
+        r = self._run_cli(['--output-dir', self.tmp_dir], stdin=_MINIMAL_JSON)
         self.assertEqual(r.returncode, 0, f'CLI stdin failed:\n{r.stdout}\n{r.stderr}')
         self.assertTrue(os.path.exists(os.path.join(self.tmp_dir, 'src', 'js', 'sim_todo.js')))
 
     def test_cli_creates_state_json(self):
         spec_path = os.path.join(self.tmp_dir, 'pm_spec.json')
-        with open(spec_path, 'w') as f:
-            json.dump(PM_SPEC, f)
+        with open(spec_path, 'wb') as f:
+            f.write(_PM_JSON_BYTES)
         r = self._run_cli([spec_path, '--output-dir', self.tmp_dir])
         self.assertEqual(r.returncode, 0, f'CLI failed:\n{r.stdout}\n{r.stderr}')
         state_path = os.path.join(self.tmp_dir, 'state', 'simulations', 'project_manager', 'state.json')
@@ -663,16 +908,16 @@ class TestCLI(unittest.TestCase):
 
     def test_cli_creates_test_file(self):
         spec_path = os.path.join(self.tmp_dir, 'spec.json')
-        with open(spec_path, 'w') as f:
-            json.dump(MINIMAL_SPEC, f)
+        with open(spec_path, 'wb') as f:
+            f.write(_MINIMAL_JSON_BYTES)
         r = self._run_cli([spec_path, '--output-dir', self.tmp_dir])
         self.assertEqual(r.returncode, 0)
         self.assertTrue(os.path.exists(os.path.join(self.tmp_dir, 'tests', 'test_sim_todo.js')))
 
     def test_cli_reports_created_files(self):
         spec_path = os.path.join(self.tmp_dir, 'spec.json')
-        with open(spec_path, 'w') as f:
-            json.dump(MINIMAL_SPEC, f)
+        with open(spec_path, 'wb') as f:
+            f.write(_MINIMAL_JSON_BYTES)
         r = self._run_cli([spec_path, '--output-dir', self.tmp_dir])
         self.assertEqual(r.returncode, 0)
         self.assertIn('sim_todo', r.stdout)
@@ -682,8 +927,7 @@ class TestCLI(unittest.TestCase):
         self.assertNotEqual(r.returncode, 0)
 
     def test_cli_no_args_reads_stdin(self):
-        spec_json = json.dumps(MINIMAL_SPEC)
-        r = self._run_cli(['--output-dir', self.tmp_dir], stdin=spec_json)
+        r = self._run_cli(['--output-dir', self.tmp_dir], stdin=_MINIMAL_JSON)
         self.assertEqual(r.returncode, 0, f'stdin mode failed:\n{r.stdout}\n{r.stderr}')
 
 
@@ -2,8 +2,10 @@
 """Tests for progressive taxation and UBI system."""
 import json
 import os
+import random
 import sys
 import unittest
+from unittest import mock
 
 # Add scripts to path
 script_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts')
@@ -11,6 +13,14 @@ sys.path.insert(0, script_dir)
 
 from economy_engine import _get_tax_rate, TREASURY_ID, process_earnings
 from game_tick import _get_ubi_eligible, _distribute_ubi
+from civilization_sim import (
+    sim_tick, create_initial_state, _apply_action, _econ_txn, SIM_TREASURY_ID,
+)
+
+
+def _seeded_rng():
+    """Fresh deterministic RNG for the civilization_sim tests."""
+    return random.Random(42)
 
 
 class TestTaxBrackets(unittest.TestCase):
@@ -45,6 +55,11 @@ class TestTaxBrackets(unittest.TestCase):
         self.assertEqual(_get_tax_rate(-5), 0.0)
         self.assertEqual(_get_tax_rate(-100), 0.0)
 
+    def test_fractional_balance_uses_lower_bracket(self):
+        self.assertEqual(_get_tax_rate(19.5), 0.0)
+        self.assertEqual(_get_tax_rate(49.5), 0.05)
+        self.assertEqual(_get_tax_rate(499.9), 0.25)
+
 
 class TestProcessEarningsWithTax(unittest.TestCase):
     """Test economy_engine process_earnings with tax."""
@@ -164,6 +179,57 @@ class TestUBIDistribution(unittest.TestCase):
         self.assertEqual(ubi_txns[0]['to'], 'user1')
         self.assertEqual(ubi_txns[0]['amount'], 5)
 
+    def test_prior_ledger_entries_not_mirrored_again(self):
+        old_entry = {'type': 'ubi_distribution', 'user': 'user1', 'amount': 5,
+                     'gameDay': 0, 'timestamp': 0}
+        state = {
+            'worldTime': 1440,
+            '_lastUbiDay': 0,
+            'economy': {
+                'balances': {TREASURY_ID: 10, 'user1': 0},
+                'transactions': [],
+                'ledger': [old_entry],
+            },
+        }
+        _distribute_ubi(state)
+        ubi_txns = [t for t in state['economy']['transactions'] if t['type'] == 'ubi_payout']
+        self.assertEqual(len(ubi_txns), 1)
+        self.assertEqual(state['economy']['ledger'][0], old_entry)
+
+    def _tick_with_prior_ledger(self, prior_entries):
+        """Run a game-day boundary at a fixed clock with a pre-seeded ledger."""
+        state = {
+            'worldTime': 1440,
+            '_lastUbiDay': 0,
+            'economy': {
+                'balances': {TREASURY_ID: 0, 'rich': 1000, 'builder': 10},
+                'transactions': [],
+                'ledger': list(prior_entries),
+            },
+            'structures': {'s1': {'builder': 'builder'}},
+        }
+        # A fixed clock gives the seeded entries the same timestamp as the
+        # new ones, so only the ledger position tells them apart.
+        with mock.patch('game_tick.time.time', return_value=5000.0):
+            _distribute_ubi(state)
+        return state['economy']['transactions']
+
+    def test_prior_wealth_tax_entries_not_mirrored_again(self):
+        old_entry = {'type': 'wealth_tax', 'user': 'old', 'amount': 3,
+                     'timestamp': 5000.0}
+        txns = self._tick_with_prior_ledger([old_entry])
+        tax_txns = [t for t in txns if t['type'] == 'wealth_tax']
+        self.assertEqual([t['from'] for t in tax_txns], ['rich'])
+        self.assertEqual(tax_txns[0]['amount'], 10)
+
+    def test_prior_maintenance_entries_not_mirrored_again(self):
+        old_entry = {'type': 'structure_maintenance', 'user': 'old', 'amount': 1,
+                     'structureId': 'gone', 'sink': 'SYSTEM', 'timestamp': 5000.0}
+        txns = self._tick_with_prior_ledger([old_entry])
+        maint_txns = [t for t in txns if t['type'] == 'maintenance']
+        self.assertEqual([t['structureId'] for t in maint_txns], ['s1'])
+        self.assertEqual(maint_txns[0]['from'], 'builder')
+
     def test_ubi_with_empty_treasury_does_nothing(self):
         state = {
             'worldTime': 1440,
@@ -182,10 +248,6 @@ class TestSimMaintenance(unittest.TestCase):
 
     def test_maintenance_charges_structure_owners(self):
         """Structures cost their builders spark via maintenance."""
-        from civilization_sim import (
-            sim_tick, create_initial_state, SIM_MAINTENANCE_COST,
-            SIM_TREASURY_ID, TICK_SECONDS,
-        )
         agents = [
             {'id': 'agent1', 'name': 'Builder1', 'archetype': 'builder',
              'spark': 100, 'intentions': ['build']},
@@ -205,8 +267,7 @@ class TestSimMaintenance(unittest.TestCase):
         state['worldTime'] = 1440  # Day 1
         state['_lastUbiDay'] = -1
 
-        import random
-        rng = random.Random(42)
+        rng = _seeded_rng()
         state, events = sim_tick(state, 1, rng)
 
         # Check maintenance transaction exists
@@ -217,10 +278,6 @@ class TestSimMaintenance(unittest.TestCase):
 
     def test_maintenance_decays_unpaid_structures(self):
         """Structures with 2 missed payments are removed."""
-        from civilization_sim import (
-            sim_tick, create_initial_state, SIM_MAINTENANCE_COST,
-            SIM_TREASURY_ID, TICK_SECONDS,
-        )
         agents = [
             {'id': 'agent1', 'name': 'BrokeBuilder', 'archetype': 'builder',
              'spark': 0, 'intentions': ['say']},
@@ -240,8 +297,7 @@ class TestSimMaintenance(unittest.TestCase):
         state['worldTime'] = 1440
         state['_lastUbiDay'] = -1
 
-        import random
-        rng = random.Random(42)
+        rng = _seeded_rng()
         state, events = sim_tick(state, 1, rng)
 
         # Structure should be removed after 2nd missed payment
@@ -250,9 +306,7 @@ class TestSimMaintenance(unittest.TestCase):
 
     def test_sim_costs_increased(self):
         """Build/plant/craft costs should be higher than before."""
-        from civilization_sim import _apply_action
-        import random
-        rng = random.Random(42)
+        rng = _seeded_rng()
 
         # Create minimal state
         state = {
@@ -274,7 +328,6 @@ class TestEconTxnRefusal(unittest.TestCase):
     """Test that _econ_txn refuses actions when agent can't afford them (§6.4)."""
 
     def setUp(self):
-        from civilization_sim import _econ_txn, SIM_TREASURY_ID
         self._econ_txn = _econ_txn
         self.SIM_TREASURY_ID = SIM_TREASURY_ID
 
@@ -318,9 +371,7 @@ class TestHarvestYieldReduced(unittest.TestCase):
 
     def test_harvest_yield_range(self):
         """Harvest should yield 1-4 spark (mean 2.5), not 2-8."""
-        from civilization_sim import _apply_action
-        import random
-        rng = random.Random(42)
+        rng = _seeded_rng()
 
         state = {
             'economy': {'balances': {'agent1': 100}, 'transactions': [], 'listings': []},
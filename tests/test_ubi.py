@@ -30,6 +30,7 @@ from economy_engine import (
     BASE_UBI_AMOUNT,
     distribute_ubi,
     get_ubi_eligible_citizens,
+    iter_ubi_entries,
     process_earnings,
     apply_wealth_tax,
 )
@@ -302,6 +303,27 @@ class TestLedgerEntries(unittest.TestCase):
         for entry in ubi_entries:
             self.assertEqual(entry['timestamp'], ts)
 
+    def test_batch_ledger_records_single_entry(self):
+        citizens = {f'j{i}': 0 for i in range(4)}
+        citizens[TREASURY_ID] = 100
+        eco = _economy(balances=citizens)
+        distribute_ubi(eco, game_day=1, timestamp=5.0, batch_ledger=True)
+        self.assertEqual(len(eco['ledger']), 1)
+        batch = eco['ledger'][0]
+        self.assertEqual(batch['type'], 'ubi_distribution_batch')
+        self.assertEqual(sorted(batch['recipients']), ['j0', 'j1', 'j2', 'j3'])
+        self.assertEqual(batch['amount'], 5)
+        self.assertEqual(eco['balances'][TREASURY_ID], 80)
+
+    def test_iter_ubi_entries_matches_per_citizen_ledger(self):
+        balances = {TREASURY_ID: 50, 'k1': 0, 'k2': 3}
+        plain = _economy(balances=balances)
+        batched = _economy(balances=balances)
+        distribute_ubi(plain, game_day=2, timestamp=7.0)
+        distribute_ubi(batched, game_day=2, timestamp=7.0, batch_ledger=True)
+        self.assertEqual(list(iter_ubi_entries(batched)), list(iter_ubi_entries(plain)))
+        self.assertEqual(batched['balances'], plain['balances'])
+
 
 # ---------------------------------------------------------------------------
 # 5. TREASURY balance tracking
@@ -426,6 +448,11 @@ class TestUBIIdempotency(unittest.TestCase):
         # Should have received only one UBI payment
         self.assertEqual(eco['balances']['v'], 5)
 
+    def test_repeat_day_leaves_economy_untouched(self):
+        eco = {'_lastUbiDay': 4}
+        distribute_ubi(eco, game_day=4)
+        self.assertEqual(eco, {'_lastUbiDay': 4})
+
 
 # ---------------------------------------------------------------------------
 # 7. Edge cases